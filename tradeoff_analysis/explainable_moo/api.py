@@ -1,54 +1,278 @@
+from desdeo_problem.problem import DiscreteDataProblem
 from desdeo_tools.scalarization import StomASF
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from explainable_moo.problems import problems
-from explainable_moo.core.lime_explanations.kkt_multipliers import compute_multipliers
+from explainable_moo.problems import compiled
+from explainable_moo.problems.registry import ProblemRegistry, UnknownProblemError
+from explainable_moo.core.lime_explanations.kkt_multipliers import (
+    ASFSolverSession,
+    SolverError,
+    compute_multipliers,
+)
+from explainable_moo.core.lime_explanations.atlas import (
+    MultiplierAtlas,
+    atlas_filename,
+)
 from explainable_moo.core.lime_explanations.compute_tradeoffs import (
     compute_tradeoffs_objectives,
 )
 from explainable_moo.core.lime_explanations.approximate_solutions import (
     compute_approximate_pareto_optimal_objective_vector,
+    compute_approximate_pareto_optimal_objective_vectors,
+    generate_neighborhood_lhs_points,
+)
+from explainable_moo.core.lime_explanations.discrete import explain_front_points
+from explainable_moo.core.lime_explanations.surrogate import fit_local_surrogate
+from explainable_moo.utils.cache import SolutionCache
+from explainable_moo.utils.front_index import FrontIndex
+from explainable_moo.utils.instrumentation import (
+    configure_logging,
+    log_event,
+    metrics,
+    span,
 )
+from explainable_moo.utils.jobs import JobQueue, QueueFullError
 from flask_cors import CORS
 
+import atexit
+import concurrent.futures
+import json
+import logging
+import os
+import threading
 import numpy as np
 
+logger = logging.getLogger("explainable_moo.api")
+# Structured JSON logs, e.g. EXPLAINABLE_MOO_LOG_LEVEL=DEBUG
+if os.environ.get("EXPLAINABLE_MOO_LOG_LEVEL") is not None:
+    configure_logging(os.environ["EXPLAINABLE_MOO_LOG_LEVEL"].upper())
+
 app = Flask(__name__, static_url_path="", static_folder="data")
 CORS(app)  # This will enable CORS for all routes
 
 decimal_places = 5
 # Global values
-optimization_problems = {
-    1: {
-        "name": "RPP",
-        "definition": problems.river_pollution_problem(),
-        "ideal": np.array([-6.34, -3.44487179, -7.5, 0.0]),
-        "nadir": np.array([-4.751, -2.85346154, -0.32111111, 9.70666667]),
-        "multipliers": np.array([-1, -1, -1, -1]),
-        "shortnames": np.array(["f_1", "f_2", "f_3", "f_4"]),
-    },
-    2: {
-        "name": "CCW",
-        "definition": problems.car_crash_problem(),
-        "ideal": [0, 0, 0, 0],
-        "nadir": [1, 1, 1, 1],
-        "multipliers": [-1, -1, -1, -1],
-        "shortnames": np.array(["f_1", "f_2", "f_3", "f_4"]),
-    },
-    3: {
-        "name": "RPP",
-        "definition": problems.discrete_river_pollution(),
-        "multipliers": np.array([-1, -1, -1, -1, -1]),
-        "explainer": None,
-        "missing_data": [],
-        "bb": [],
-    },
-}
+# Problems are only constructed on their first request
+optimization_problems = ProblemRegistry()
+optimization_problems.register(
+    1,
+    problems.river_pollution_problem,
+    evaluator_factory=compiled.compiled_river_pollution_evaluator,
+    name="RPP",
+    ideal=np.array([-6.34, -3.44487179, -7.5, 0.0]),
+    nadir=np.array([-4.751, -2.85346154, -0.32111111, 9.70666667]),
+    multipliers=np.array([-1, -1, -1, -1]),
+    shortnames=np.array(["f_1", "f_2", "f_3", "f_4"]),
+)
+optimization_problems.register(
+    2,
+    problems.car_crash_problem,
+    evaluator_factory=compiled.compiled_car_crash_evaluator,
+    name="CCW",
+    ideal=np.array([1661.70782, 6.14280237, 0.04256944]),
+    nadir=np.array([1691.40716, 10.4281135, 0.26399991]),
+    multipliers=np.array([-1, -1, -1]),
+    shortnames=np.array(["f_1", "f_2", "f_3"]),
+)
+optimization_problems.register(
+    3,
+    problems.discrete_river_pollution,
+    name="RPP",
+    multipliers=np.array([-1, -1, -1, -1, -1]),
+    shortnames=np.array(["f_1", "f_2", "f_3", "f_4", "f_5"]),
+    explainer=None,
+    missing_data=[],
+    bb=[],
+)
+# More problems can be added with a JSON file, see ProblemRegistry.load_config
+if os.environ.get("EXPLAINABLE_MOO_PROBLEMS") is not None:
+    optimization_problems.load_config(os.environ["EXPLAINABLE_MOO_PROBLEMS"])
+
+
+def get_problem_id(data):
+    return int((data or {}).get("problem_id", 1))
+
+
+def json_values(values):
+    """
+    Nested list of the values of an array for jsonify, with None (null) in
+    place of NaN and infinite values, which are not valid JSON. Trade-offs
+    with a zero multiplier are infinite or NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+@app.errorhandler(UnknownProblemError)
+def unknown_problem(e):
+    return jsonify({"error": f"Unknown problem {e.args[0]}"}), 404
+
+
+@app.errorhandler(SolverError)
+def solver_error(e):
+    log_event(logger, "solver_error", level=logging.WARNING, error=str(e))
+    return jsonify({"error": str(e)}), 500
+
+
+@app.errorhandler(TimeoutError)
+def solve_timed_out(e):
+    log_event(logger, "solve_timeout", level=logging.WARNING, error=str(e))
+    return jsonify({"error": str(e)}), 504
+
+
+# Time limit in seconds of a solve, enforced by the solvers and by the
+# requests waiting for a solve
+solve_timeout = float(os.environ.get("EXPLAINABLE_MOO_SOLVE_TIMEOUT", 30))
+
+
+# One long-lived solver session per problem, created on the first request
+solver_sessions = {}
+solver_sessions_lock = threading.Lock()
+
+
+def get_solver_session(problem_id):
+    with solver_sessions_lock:
+        if problem_id not in solver_sessions:
+            session = ASFSolverSession(
+                optimization_problems[problem_id]["definition"],
+                optimization_problems[problem_id]["ideal"],
+                optimization_problems[problem_id]["nadir"],
+                normalizer=optimization_problems[problem_id]["normalizer"],
+            )
+            session.model.options.MAX_TIME = solve_timeout
+            solver_sessions[problem_id] = session
+    return solver_sessions[problem_id]
+
+
+# Multiplier atlases built offline with
+# python -m explainable_moo.core.lime_explanations.atlas <problem_id> <dir>
+# and loaded from the directory EXPLAINABLE_MOO_ATLAS_DIR, used as warm
+# starts of the scipy solves
+atlas_dir = os.environ.get("EXPLAINABLE_MOO_ATLAS_DIR")
+atlases = {}
+
+
+def get_atlas(problem_id):
+    if problem_id not in atlases:
+        atlases[problem_id] = None
+        if atlas_dir is not None:
+            path = os.path.join(atlas_dir, atlas_filename(problem_id))
+            if os.path.exists(path):
+                atlases[problem_id] = MultiplierAtlas.load(path)
+    return atlases[problem_id]
+
+
+# Spatial indexes of the discrete fronts, built on the first request. Their
+# reference points are explained with the stored front instead of a solver.
+front_indexes = {}
+front_indexes_lock = threading.Lock()
+
+
+def is_discrete(problem_id):
+    return isinstance(
+        optimization_problems[problem_id]["definition"], DiscreteDataProblem
+    )
+
+
+def get_front_index(problem_id):
+    with front_indexes_lock:
+        if problem_id not in front_indexes:
+            entry = optimization_problems[problem_id]
+            front_indexes[problem_id] = FrontIndex(
+                entry["definition"].objectives, entry["ideal"], entry["nadir"]
+            )
+    return front_indexes[problem_id]
+
+
+def solve_discrete_reference_points(problem_id, reference_points):
+    index = get_front_index(problem_id)
+    multipliers = np.array(optimization_problems[problem_id]["multipliers"])
+    num_objectives = index.objectives.shape[1]
+    w = [1 / num_objectives] * num_objectives
+
+    reference_points = np.atleast_2d(np.array(reference_points, dtype=float))
+    with span("discrete_solve"):
+        points, lagrange_multipliers, _ = explain_front_points(
+            index, reference_points * multipliers, w
+        )
+    fx = index.objectives[points] * multipliers
+    partial_tradeoffs = compute_tradeoffs_objectives(
+        lagrange_multipliers, w, range(num_objectives)
+    )
+    return {
+        "lagrange_multipliers": json_values(lagrange_multipliers),
+        "partial_tradeoffs": json_values(partial_tradeoffs),
+        "fx": json_values(fx),
+    }
+
+
+def solve_point(problem_id, w, reference_point):
+    """
+    Solve the ASF problem of a reference point, in the objective space of the
+    problem. All the endpoints solve through here, so a cached solution does
+    not depend on the endpoint that computed it. The problem is solved with
+    its atlas when there is one, else with the scipy backend
+    when the problem has a compiled evaluator (about 1 ms per solve) and with
+    its GEKKO session otherwise.
+    """
+    entry = optimization_problems[problem_id]
+    atlas = get_atlas(problem_id)
+    if atlas is not None:
+        return atlas.solve(
+            entry["definition"],
+            reference_point,
+            w,
+            evaluator=entry.get("evaluator"),
+            max_time=solve_timeout,
+        )
+    if entry.get("evaluator") is not None:
+        return compute_multipliers(
+            entry["definition"],
+            w,
+            reference_point,
+            entry["ideal"],
+            entry["nadir"],
+            backend="scipy",
+            evaluator=entry["evaluator"],
+            normalizer=entry["normalizer"],
+            max_time=solve_timeout,
+        )
+    return get_solver_session(problem_id).solve(w, reference_point)
+
+
+# Solutions already computed, persisted across restarts when
+# EXPLAINABLE_MOO_CACHE points to a file
+solution_cache = SolutionCache(
+    maxsize=4096,
+    decimal_places=decimal_places,
+    path=os.environ.get("EXPLAINABLE_MOO_CACHE"),
+)
+atexit.register(solution_cache.save)
+
+# Bounded pool running the solves, identical reference points in flight are
+# solved only once
+solver_jobs = JobQueue(max_workers=4, max_pending=64)
+
+metrics.gauge(
+    "job_queue_depth", lambda: solver_jobs.depth, "Pending and running solver jobs."
+)
+metrics.gauge("solution_cache_size", lambda: len(solution_cache), "Cached solutions.")
+metrics.counter(
+    "solution_cache_hits", lambda: solution_cache.hits, "Solution cache hits."
+)
+metrics.counter(
+    "solution_cache_misses", lambda: solution_cache.misses, "Solution cache misses."
+)
 
 
 @app.route("/get_details_problem", methods=["POST"])
 def get_details_problem():
-    problem_id = 1
+    problem_id = get_problem_id(request.get_json(silent=True))
     problem = optimization_problems[problem_id]["definition"]
+    if is_discrete(problem_id):
+        objective_names = problem.objective_names
+    else:
+        objective_names = problem.get_objective_names()
     multipiers = np.array(optimization_problems[problem_id]["multipliers"])
     ideal = np.array(optimization_problems[problem_id]["ideal"]) * multipiers
     nadir = np.array(optimization_problems[problem_id]["nadir"]) * multipiers
@@ -59,54 +283,249 @@ def get_details_problem():
             "ideal": ideal.tolist(),
             "nadir": nadir.tolist(),
             "num_objectives": problem.n_of_objectives,
-            "objective_names": problem.get_objective_names(),
+            "objective_names": objective_names,
             "short_names": shortnames.tolist(),
             "decimal_places": decimal_places,
         }
     )
 
 
-@app.route("/get_solution", methods=["POST"])
-def get_solution():
-    data = request.get_json()
-    problem_id = 1
-    reference_point = data.get("reference_point")
+def solve_reference_point(problem_id, reference_point):
+    if is_discrete(problem_id):
+        solution = solve_discrete_reference_points(problem_id, [reference_point])
+        return {key: values[0] for key, values in solution.items()}
 
     problem = optimization_problems[problem_id]["definition"]
-    ideal = optimization_problems[problem_id]["ideal"]
-    nadir = optimization_problems[problem_id]["nadir"]
     multipliers = optimization_problems[problem_id]["multipliers"]
     objectives = problem.objectives
     num_objectives = problem.n_of_objectives
     base_weight = 1 / num_objectives
     w = [base_weight] * num_objectives
+
+    with span("cache_lookup"):
+        cached = solution_cache.get(problem_id, reference_point, w)
+    if cached is not None:
+        return {
+            "lagrange_multipliers": json_values(cached["lagrange_multipliers"]),
+            "partial_tradeoffs": json_values(cached["partial_tradeoffs"]),
+            "fx": json_values(cached["fx"]),
+        }
+
     # uncomment this when switching to maximizatiom
     # new_reference_point = -1 * np.array(reference_point)
     new_reference_point = np.array(reference_point) * multipliers
-    x, lagrange_multipliers = compute_multipliers(
-        problem, w, new_reference_point, ideal, nadir
-    )
+    with span("solve"):
+        x, lagrange_multipliers = solve_point(problem_id, w, new_reference_point)
 
-    fx = problem.evaluate(np.array(x))
+    with span("evaluate"):
+        fx = problem.evaluate(np.array(x))
     fx = fx.objectives[0] * multipliers
     # z_values = generate_neighborhood_scaled_points(fx, 50,5,default_problem.get_nadir(), default_problem.get_ideal())
     # approx_solutions = compute_approximate_pareto_optimal_objective_vectors(fx, lagrange_multipliers,z_values,w)
 
     # partial_tradeoffs = compute_tradeoffs_slope(approx_solutions)
 
-    print("reference point", reference_point)
-    print("computed fx", fx)
-    partial_tradeoffs = compute_tradeoffs_objectives(
-        lagrange_multipliers, w, objectives
+    log_event(logger, "solution", reference_point=reference_point, fx=fx)
+    with span("tradeoffs"):
+        partial_tradeoffs = compute_tradeoffs_objectives(
+            lagrange_multipliers, w, objectives
+        )
+    solution_cache.put(
+        problem_id,
+        reference_point,
+        w,
+        {
+            "x": x,
+            "lagrange_multipliers": lagrange_multipliers,
+            "fx": fx,
+            "partial_tradeoffs": partial_tradeoffs,
+        },
     )
 
-    return jsonify(
-        {
-            "lagrange_multipliers": lagrange_multipliers.tolist(),
-            "partial_tradeoffs": partial_tradeoffs.tolist(),
-            "fx": fx.tolist(),
-        }
+    return {
+        "lagrange_multipliers": json_values(lagrange_multipliers),
+        "partial_tradeoffs": json_values(partial_tradeoffs),
+        "fx": json_values(fx),
+    }
+
+
+def solve_reference_points(problem_id, reference_points):
+    if is_discrete(problem_id):
+        return solve_discrete_reference_points(problem_id, reference_points)
+
+    problem = optimization_problems[problem_id]["definition"]
+    multipliers = np.array(optimization_problems[problem_id]["multipliers"])
+    num_objectives = problem.n_of_objectives
+    w = [1 / num_objectives] * num_objectives
+
+    reference_points = np.atleast_2d(np.array(reference_points, dtype=float))
+    X = np.zeros((len(reference_points), problem.n_of_variables))
+    lagrange_multipliers = np.zeros(reference_points.shape)
+
+    missing = []
+    for n, reference_point in enumerate(reference_points):
+        cached = solution_cache.get(problem_id, reference_point, w)
+        if cached is None:
+            missing.append(n)
+        else:
+            X[n] = cached["x"]
+            lagrange_multipliers[n] = cached["lagrange_multipliers"]
+
+    for n in missing:
+        X[n], lagrange_multipliers[n] = solve_point(
+            problem_id, w, reference_points[n] * multipliers
+        )
+
+    fx = problem.evaluate(X).objectives * multipliers
+    partial_tradeoffs = compute_tradeoffs_objectives(
+        lagrange_multipliers, w, problem.objectives
     )
+    for n in missing:
+        solution_cache.put(
+            problem_id,
+            reference_points[n],
+            w,
+            {
+                "x": X[n],
+                "lagrange_multipliers": lagrange_multipliers[n],
+                "fx": fx[n],
+                "partial_tradeoffs": partial_tradeoffs[n],
+            },
+        )
+
+    return {
+        "lagrange_multipliers": json_values(lagrange_multipliers),
+        "partial_tradeoffs": json_values(partial_tradeoffs),
+        "fx": json_values(fx),
+    }
+
+
+def submit_solution_job(problem_id, reference_point):
+    key = (problem_id, tuple(np.round(reference_point, decimal_places)))
+    return solver_jobs.submit(key, solve_reference_point, problem_id, reference_point)
+
+
+def job_result(job_id, timeout=None):
+    """
+    Wait for the result of a solver job, for at most timeout seconds
+    (solve_timeout by default), so a hung solve never blocks a request forever.
+    """
+    if timeout is None:
+        timeout = solve_timeout
+    try:
+        return solver_jobs.future(job_id).result(timeout=timeout)
+    except concurrent.futures.TimeoutError as e:
+        raise TimeoutError(f"The solve took longer than {timeout} s.") from e
+
+
+@app.route("/get_solution", methods=["POST"])
+def get_solution():
+    data = request.get_json()
+    problem_id = get_problem_id(data)
+    reference_point = data.get("reference_point")
+
+    with span("get_solution"):
+        try:
+            job_id = submit_solution_job(problem_id, reference_point)
+        except QueueFullError as e:
+            return jsonify({"error": str(e)}), 429
+
+        return jsonify(job_result(job_id))
+
+
+@app.route("/get_solutions_batch", methods=["POST"])
+def get_solutions_batch():
+    data = request.get_json()
+    problem_id = get_problem_id(data)
+    reference_points = data.get("reference_points")
+
+    key = (problem_id, "batch", np.round(reference_points, decimal_places).tobytes())
+    try:
+        job_id = solver_jobs.submit(
+            key, solve_reference_points, problem_id, reference_points
+        )
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 429
+
+    # Every reference point of the batch gets the time limit of a solve
+    timeout = solve_timeout * len(np.atleast_2d(reference_points))
+    return jsonify(job_result(job_id, timeout=timeout))
+
+
+def stream_reference_points(problem_id, reference_points, job_id=None):
+    """
+    Solve reference points one by one through the job queue, like
+    /get_solution, so every solve counts in the queue depth and its result is
+    cached and identical to the ones of the other endpoints. job_id is the
+    job of the first reference point when it has already been submitted.
+
+    A reference point that cannot be solved yields an error instead of a
+    solution, and the stream ends when the job queue is saturated.
+    """
+    for reference_point in reference_points:
+        try:
+            if job_id is None:
+                job_id = submit_solution_job(problem_id, reference_point)
+            solution = job_result(job_id)
+        except QueueFullError as e:
+            yield {"reference_point": reference_point, "error": str(e)}
+            return
+        except (SolverError, TimeoutError) as e:
+            solution = {"error": str(e)}
+        job_id = None
+        yield {"reference_point": reference_point, **solution}
+
+
+@app.route("/stream_solutions", methods=["POST"])
+def stream_solutions():
+    data = request.get_json()
+    problem_id = get_problem_id(data)
+    reference_points = data.get("reference_points") or []
+
+    # The first reference point is submitted before the response starts, so
+    # a saturated queue is answered with 429 like the other endpoints
+    job_id = None
+    if reference_points:
+        try:
+            job_id = submit_solution_job(problem_id, reference_points[0])
+        except QueueFullError as e:
+            return jsonify({"error": str(e)}), 429
+
+    # One JSON document per line (NDJSON), sent as soon as each solve finishes
+    def generate():
+        for result in stream_reference_points(problem_id, reference_points, job_id):
+            yield json.dumps(result) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/submit_solution", methods=["POST"])
+def submit_solution():
+    data = request.get_json()
+    problem_id = get_problem_id(data)
+    reference_point = data.get("reference_point")
+
+    try:
+        job_id = submit_solution_job(problem_id, reference_point)
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 429
+
+    return jsonify({"job_id": job_id}), 202
+
+
+@app.route("/get_job/<job_id>", methods=["GET"])
+def get_job(job_id):
+    status = solver_jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    if status["status"] in ("pending", "running"):
+        return jsonify(status), 202
+    return jsonify(status)
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/get_kkt_multipliers", methods=["POST"])
@@ -135,7 +554,53 @@ def compute_point():
     )
     return jsonify(
         {
-            "approximated_solution": computed_point.tolist(),
+            "approximated_solution": json_values(computed_point),
+        }
+    )
+
+
+@app.route("/approximate_solutions_batch", methods=["POST"])
+def compute_points():
+    data = request.get_json()
+    reference_point = data.get("reference_point")
+    new_reference_points = data.get("new_reference_points")
+    lagrange_multipliers = data.get("multipliers")
+    num_objectives = data.get("num_objectives")
+    base_weight = 1 / num_objectives
+    w = [base_weight] * num_objectives
+
+    computed_points = compute_approximate_pareto_optimal_objective_vectors(
+        reference_point, lagrange_multipliers, new_reference_points, w
+    )
+    return jsonify(
+        {
+            "approximated_solutions": json_values(computed_points),
+        }
+    )
+
+
+@app.route("/local_surrogate", methods=["POST"])
+def local_surrogate():
+    data = request.get_json()
+    reference_point = data.get("reference_point")
+    lagrange_multipliers = data.get("multipliers")
+    num_objectives = data.get("num_objectives")
+    num_points = data.get("num_points", 100)
+    radius = data.get("radius", 0.1)
+    base_weight = 1 / num_objectives
+    w = [base_weight] * num_objectives
+
+    with span("local_surrogate"):
+        z_values = generate_neighborhood_lhs_points(reference_point, num_points, radius)
+        approx_solutions = compute_approximate_pareto_optimal_objective_vectors(
+            reference_point, lagrange_multipliers, z_values, w
+        )
+        explanation = fit_local_surrogate(reference_point, approx_solutions)
+    return jsonify(
+        {
+            "slopes": json_values(explanation.slopes),
+            "intercepts": json_values(explanation.intercepts),
+            "fidelity": json_values(explanation.fidelity),
         }
     )
 
@@ -0,0 +1,415 @@
+"""
+Benchmarks of the explanation pipeline.
+
+Every case times one stage of the pipeline (solving the ASF problem for the
+Lagrange multipliers, computing the trade-offs, generating neighborhoods and
+approximating Pareto optimal solutions) on one of the bundled problems and
+sizes. The results are written to JSON and can be compared with a baseline:
+
+    python -m explainable_moo.benchmark --output results.json
+    python -m explainable_moo.benchmark --baseline results.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from explainable_moo.core.lime_explanations.approximate_solutions import (
+    compute_approximate_pareto_optimal_objective_vector,
+    compute_approximate_pareto_optimal_objective_vectors,
+    estimate_tangent_hyperplanes,
+    generate_neighborhood_lhs_points,
+    generate_neighborhood_scaled_points,
+)
+from explainable_moo.core.lime_explanations.compute_tradeoffs import (
+    compute_tradeoffs_objectives,
+)
+from explainable_moo.core.lime_explanations.discrete import explain_front_point
+from explainable_moo.core.lime_explanations.kkt_multipliers import (
+    ASFSolverSession,
+    compute_multipliers,
+    compute_multipliers_batch,
+)
+from explainable_moo.core.lime_explanations.surrogate import fit_local_surrogate
+from explainable_moo.problems import problems
+from explainable_moo.problems.compiled import (
+    compiled_car_crash_evaluator,
+    compiled_river_pollution_evaluator,
+)
+from explainable_moo.utils.front_index import FrontIndex
+from explainable_moo.utils.utils import Normalizer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# A benchmark case: run() executes the stage once. When it returns a dict, its
+# entries are recorded as counters, e.g. solver iterations.
+Case = namedtuple("Case", ["name", "run"])
+
+
+def _front_bounds(filename, num_objectives):
+    objectives = pd.read_csv(os.path.join(DATA_DIR, filename)).to_numpy()
+    objectives = objectives[:, :num_objectives]
+    return np.min(objectives, axis=0), np.max(objectives, axis=0)
+
+
+def _reference_points(ideal, nadir, n, seed=0):
+    rng = np.random.default_rng(seed)
+    return ideal + rng.uniform(0.2, 0.8, (n, len(ideal))) * (nadir - ideal)
+
+
+def _counting(evaluator, counters):
+    def counted_evaluator(x, *args, **kwargs):
+        counters["evaluations"] = counters.get("evaluations", 0) + 1
+        return evaluator(x, *args, **kwargs)
+
+    return counted_evaluator
+
+
+def _solver_cases(name, problem, ideal, nadir, evaluator, gekko=True):
+    cases = []
+    k = problem.n_of_objectives
+    w = np.full(k, 1 / k)
+    z_dot = _reference_points(ideal, nadir, 1)[0]
+    normalizer = Normalizer(ideal, nadir)
+
+    def scipy_solve():
+        counters = {}
+        compute_multipliers(
+            problem,
+            w,
+            z_dot,
+            ideal,
+            nadir,
+            backend="scipy",
+            evaluator=_counting(evaluator, counters),
+            normalizer=normalizer,
+        )
+        return counters
+
+    cases.append(Case(f"{name}/compute_multipliers/scipy", scipy_solve))
+
+    for n in (16, 128):
+        Z_dot = _reference_points(ideal, nadir, n, seed=n)
+
+        def scipy_batch(Z_dot=Z_dot):
+            counters = {}
+            compute_multipliers_batch(
+                problem,
+                w,
+                Z_dot,
+                ideal,
+                nadir,
+                backend="scipy",
+                evaluator=_counting(evaluator, counters),
+                normalizer=normalizer,
+            )
+            return counters
+
+        cases.append(Case(f"{name}/compute_multipliers_batch/scipy/{n}", scipy_batch))
+
+    if gekko:
+        session = ASFSolverSession(problem, ideal, nadir, normalizer=normalizer)
+
+        def gekko_solve():
+            session.solve(w, z_dot)
+            return {"solver_iterations": int(session.model.options.ITERATIONS)}
+
+        cases.append(Case(f"{name}/compute_multipliers/gekko_session", gekko_solve))
+
+    return cases
+
+
+def _explanation_cases(name, ideal, nadir, dot_z):
+    cases = []
+    k = len(ideal)
+    w = np.full(k, 1 / k)
+    rng = np.random.default_rng(1)
+    lambdas = rng.dirichlet(np.ones(k))
+    lambdas_batch = rng.dirichlet(np.ones(k), size=1000)
+    objectives = [None] * k
+    radius = 0.05 * np.linalg.norm(nadir - ideal)
+
+    cases.append(
+        Case(
+            f"{name}/compute_tradeoffs_objectives/1",
+            lambda: compute_tradeoffs_objectives(lambdas, w, objectives),
+        )
+    )
+    cases.append(
+        Case(
+            f"{name}/compute_tradeoffs_objectives/1000",
+            lambda: compute_tradeoffs_objectives(lambdas_batch, w, objectives),
+        )
+    )
+
+    for num_points in (50, 5000):
+        z_values = generate_neighborhood_lhs_points(dot_z, num_points, radius)
+        cases.append(
+            Case(
+                f"{name}/generate_neighborhood_lhs_points/{num_points}",
+                lambda num_points=num_points: generate_neighborhood_lhs_points(
+                    dot_z, num_points, radius
+                ),
+            )
+        )
+        cases.append(
+            Case(
+                f"{name}/generate_neighborhood_scaled_points/{num_points}",
+                lambda num_points=num_points: generate_neighborhood_scaled_points(
+                    dot_z, num_points, radius, ideal, nadir
+                ),
+            )
+        )
+        cases.append(
+            Case(
+                f"{name}/compute_approximate_pareto_optimal_objective_vectors/{num_points}",
+                lambda z_values=z_values: compute_approximate_pareto_optimal_objective_vectors(
+                    dot_z, lambdas, z_values, w
+                ),
+            )
+        )
+        approx_solutions = compute_approximate_pareto_optimal_objective_vectors(
+            dot_z, lambdas, z_values, w
+        )
+        cases.append(
+            Case(
+                f"{name}/fit_local_surrogate/{num_points}",
+                lambda approx_solutions=approx_solutions: fit_local_surrogate(
+                    dot_z, approx_solutions
+                ),
+            )
+        )
+
+    z_value = generate_neighborhood_lhs_points(dot_z, 1, radius)[0]
+    cases.append(
+        Case(
+            f"{name}/compute_approximate_pareto_optimal_objective_vector/1",
+            lambda: compute_approximate_pareto_optimal_objective_vector(
+                dot_z, lambdas, z_value, w
+            ),
+        )
+    )
+    return cases
+
+
+def _front_cases(name, filename, num_objectives):
+    objectives = pd.read_csv(os.path.join(DATA_DIR, filename)).to_numpy()
+    objectives = objectives[:, :num_objectives]
+    ideal = np.min(objectives, axis=0)
+    nadir = np.max(objectives, axis=0)
+    index = FrontIndex(objectives, ideal, nadir)
+    z_dot = _reference_points(ideal, nadir, 1)[0]
+    w = np.full(num_objectives, 1 / num_objectives)
+
+    cases = [
+        Case(
+            f"{name}/front_index/asf_nearest",
+            lambda: index.asf_nearest(z_dot, w),
+        ),
+        Case(
+            f"{name}/estimate_tangent_hyperplanes/1000",
+            lambda: estimate_tangent_hyperplanes(index, objectives[:1000]),
+        ),
+        Case(
+            f"{name}/explain_front_point",
+            lambda: explain_front_point(index, z_dot, w),
+        ),
+    ]
+    dot_z = objectives[index.asf_nearest(z_dot, w)[0]]
+    return cases + _explanation_cases(name, ideal, nadir, dot_z)
+
+
+def benchmark_cases():
+    """All the benchmark cases of the bundled problems."""
+    river_ideal = np.array([-6.34, -3.44487179, -7.5, 0.0])
+    river_nadir = np.array([-4.751, -2.85346154, -0.32111111, 9.70666667])
+    river_5_ideal, river_5_nadir = _front_bounds("river_pollution_10178.csv", 5)
+    car_ideal, car_nadir = _front_bounds("car_crash_10112.csv", 3)
+
+    cases = []
+    cases += _solver_cases(
+        "river_pollution",
+        problems.river_pollution_problem(),
+        river_ideal,
+        river_nadir,
+        compiled_river_pollution_evaluator(),
+    )
+    # The fifth objective is evaluated through the compiled evaluator only
+    cases += _solver_cases(
+        "river_pollution_5",
+        problems.river_pollution_problem(five_obj=True),
+        river_5_ideal,
+        river_5_nadir,
+        compiled_river_pollution_evaluator(five_obj=True),
+        gekko=False,
+    )
+    cases += _solver_cases(
+        "car_crash",
+        problems.car_crash_problem(),
+        car_ideal,
+        car_nadir,
+        compiled_car_crash_evaluator(),
+    )
+    for name, ideal, nadir in (
+        ("river_pollution", river_ideal, river_nadir),
+        ("river_pollution_5", river_5_ideal, river_5_nadir),
+        ("car_crash", car_ideal, car_nadir),
+    ):
+        dot_z = _reference_points(ideal, nadir, 1)[0]
+        cases += _explanation_cases(name, ideal, nadir, dot_z)
+    cases += _front_cases("dtlz2_3", "DTLZ2_5x_3f_10115.csv", 3)
+    cases += _front_cases("dtlz2_5", "DTLZ2_8x_5f.csv", 5)
+    return cases
+
+
+def run_case(case, repeats=10, min_time=0.05):
+    """
+    Time a benchmark case.
+
+    The case is run once to warm up (e.g. JIT compilation), then repeats
+    times, each time in a loop of as many calls as needed to last min_time
+    seconds. The peak memory is measured with tracemalloc in a separate call.
+
+    Returns:
+    dict: Median and minimum wall time per call in seconds, peak memory in
+    bytes and the counters of the last call.
+    """
+    counters = case.run()
+    if not isinstance(counters, dict):
+        counters = {}
+
+    number = 1
+    start = time.perf_counter()
+    case.run()
+    elapsed = time.perf_counter() - start
+    if 0 < elapsed < min_time:
+        number = int(np.ceil(min_time / elapsed))
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.run()
+        times.append((time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_time": statistics.median(times),
+        "wall_time_min": min(times),
+        "peak_memory": peak_memory,
+        "calls": number * repeats,
+        **counters,
+    }
+
+
+def run_benchmarks(cases=None, repeats=10, pattern=None):
+    """
+    Run the benchmark cases whose name contains pattern.
+
+    Returns:
+    dict: Metadata of the environment and the results of every case.
+    """
+    if cases is None:
+        cases = benchmark_cases()
+
+    results = {}
+    for case in cases:
+        if pattern is not None and pattern not in case.name:
+            continue
+        # Some stages print their intermediate results
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results[case.name] = run_case(case, repeats=repeats)
+        print(
+            f"{case.name:<90} {results[case.name]['wall_time'] * 1e3:10.4f} ms"
+            f" {results[case.name]['peak_memory'] / 1024:10.1f} KiB"
+        )
+
+    return {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold=0.2, metrics=("wall_time", "peak_memory")):
+    """
+    Compare benchmark results with a baseline.
+
+    Args:
+    results (dict): Output of run_benchmarks.
+    baseline (dict): Output of run_benchmarks of the reference version.
+    threshold (float): Largest accepted relative increase of a metric.
+    metrics (tuple): Metrics compared.
+
+    Returns:
+    list: The regressions as (case, metric, baseline value, value, ratio).
+    """
+    regressions = []
+    for name, result in results["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        for metric in metrics:
+            if metric not in result or not reference.get(metric):
+                continue
+            ratio = result[metric] / reference[metric]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    (name, metric, reference[metric], result[metric], ratio)
+                )
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the explanation pipeline.")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with the results in this file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Largest accepted relative increase over the baseline",
+    )
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--filter", help="Only run the cases whose name contains this")
+    args = parser.parse_args()
+
+    results = run_benchmarks(repeats=args.repeats, pattern=args.filter)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, threshold=args.threshold)
+        for name, metric, reference, value, ratio in regressions:
+            print(
+                f"REGRESSION {name} {metric}: {reference:.6g} -> {value:.6g} ({ratio:.2f}x)"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions above {args.threshold:.0%}")
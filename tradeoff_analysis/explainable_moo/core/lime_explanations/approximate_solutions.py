@@ -1,11 +1,21 @@
+import functools
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
 import numpy as np
 from scipy.stats import qmc
 from scipy.linalg import lstsq
-from numpy.linalg import matrix_rank
-from numpy.linalg import pinv
-from scipy import stats
+from numpy.linalg import svd
+
+from explainable_moo.utils.instrumentation import log_event
+from explainable_moo.utils.non_dominated import non_dominated
+
+logger = logging.getLogger(__name__)
 
-from numpy.linalg import cond, svd
+TangentHyperplane = namedtuple(
+    "TangentHyperplane", ["normal", "effective_rank", "singular_values"]
+)
 
 
 def generate_dominated_neighborhood_points(dot_z, num_points, radius):
@@ -27,21 +37,8 @@ def generate_dominated_neighborhood_points(dot_z, num_points, radius):
     )  # Scale to radius
     points += dot_z  # Translate to dot_z
 
-    # Function to check if a point is dominated by another point
-    def is_dominated(point, other_points):
-        return any(
-            np.all(other_points <= point, axis=1) & np.any(other_points < point, axis=1)
-        )
-
     # Filter non-dominated points
-    non_dominated_points = []
-    for i in range(len(points)):
-        if not is_dominated(points[i], points[:i]) and not is_dominated(
-            points[i], points[i + 1 :]
-        ):
-            non_dominated_points.append(points[i])
-
-    return np.array(non_dominated_points)
+    return non_dominated(points)
 
 
 def generate_neighborhood_points(dot_z, num_points, radius):
@@ -65,7 +62,148 @@ def generate_neighborhood_points(dot_z, num_points, radius):
     return points
 
 
-def generate_neighborhood_lhs_points(dot_z, num_points, radius):
+class NeighborhoodSampler:
+    """
+    Pools of quasi-random directions for sampling the neighborhood of objective
+    vectors.
+
+    A pool is generated in [-1, 1]^k for each number of points requested,
+    together with the same samples projected on the unit sphere. It is made
+    of blocks of num_points samples that are each a complete design: an
+    independent Latin hypercube, the first num_points points of an aligned
+    power-of-two block of a Sobol sequence, or a segment of a Halton
+    sequence. A neighborhood is always one block, so it keeps the
+    space-filling property of a design drawn for it alone, and it is built
+    with a single broadcast, for one dot_z with shape (k,) or a batch with
+    shape (m, k). Without a block index, every request takes the next unused
+    block, so consecutive neighborhoods have different directions, and a new
+    pool is drawn when the current one runs out. With a block index, the same
+    block of the current pool is returned every time. Pools are never modified
+    in place, so a sampler can be shared by threads.
+
+    Args:
+    k (int): Number of objectives.
+    pool_size (int): Number of samples per pool, rounded down to whole blocks
+        (at least one).
+    method (str): "lhs", "sobol" or "halton".
+    seed (int): Seed of the sampler, None for random pools. The pools of a
+        seeded sampler are drawn from one generator, so the sequence of
+        neighborhoods is reproducible.
+    max_pools (int): Number of pools (one per number of points) kept, the
+        least recently used one is dropped when it is exceeded.
+    """
+
+    def __init__(self, k, pool_size=4096, method="lhs", seed=None, max_pools=16):
+        if method not in ("lhs", "sobol", "halton"):
+            raise ValueError(
+                f"Unknown method '{method}', expected 'lhs', 'sobol' or 'halton'."
+            )
+        self.k = k
+        self.pool_size = pool_size
+        self.method = method
+        self.seed = seed
+        self.max_pools = max_pools
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        # {num_points: (cube, sphere, number of blocks already used)}
+        self._pools = OrderedDict()
+
+    def _generate(self, num_points, num_blocks):
+        if self.method == "lhs":
+            # One independent Latin hypercube per block: every variable of a
+            # block visits each of its num_points strata exactly once
+            strata = self._rng.permuted(
+                np.broadcast_to(
+                    np.arange(num_points), (num_blocks, self.k, num_points)
+                ),
+                axis=-1,
+            )
+            samples = (strata + self._rng.random(strata.shape)) / num_points
+            samples = np.swapaxes(samples, 1, 2)
+        elif self.method == "sobol":
+            # Aligned blocks of 2^m points of a Sobol sequence are balanced
+            m = int(np.ceil(np.log2(num_points)))
+            num_blocks = 2 ** int(np.ceil(np.log2(num_blocks)))
+            samples = qmc.Sobol(d=self.k, seed=self._rng).random_base2(
+                m + int(np.log2(num_blocks))
+            )
+            samples = samples.reshape(num_blocks, 2**m, self.k)[:, :num_points]
+        else:
+            samples = qmc.Halton(d=self.k, seed=self._rng).random(
+                num_blocks * num_points
+            )
+            samples = samples.reshape(num_blocks, num_points, self.k)
+
+        cube = samples * 2 - 1  # Scale to [-1, 1]
+        sphere = cube / np.linalg.norm(cube, axis=-1)[..., np.newaxis]
+        return cube, sphere
+
+    def _block(self, num_points, block):
+        with self._lock:
+            pool = self._pools.get(num_points)
+            num_blocks = max(1, self.pool_size // num_points)
+            if block is None:
+                if pool is None or pool[2] >= len(pool[0]):
+                    pool = (*self._generate(num_points, num_blocks), 0)
+                block = pool[2]
+                pool = (pool[0], pool[1], block + 1)
+            elif pool is None or block >= len(pool[0]):
+                cube, sphere = self._generate(num_points, max(num_blocks, block + 1))
+                pool = (cube, sphere, 0 if pool is None else pool[2])
+            self._pools[num_points] = pool
+            self._pools.move_to_end(num_points)
+            while len(self._pools) > self.max_pools:
+                self._pools.popitem(last=False)
+        return pool[0][block], pool[1][block]
+
+    def samples(self, num_points, block=None):
+        """
+        num_points samples of [-1, 1]^k, as a view, from the given block of
+        the pool or from the next unused one.
+        """
+        return self._block(num_points, block)[0]
+
+    def directions(self, num_points, block=None):
+        """
+        num_points unit directions, as a view, from the given block of the
+        pool or from the next unused one.
+        """
+        return self._block(num_points, block)[1]
+
+    def points(self, dot_z, num_points, radius, block=None):
+        """
+        Points at distance radius from dot_z, see generate_neighborhood_lhs_points.
+
+        Returns:
+        numpy.ndarray: Points with shape (num_points, k), or (m, num_points, k)
+        for a batch of m vectors dot_z.
+        """
+        directions = self.directions(num_points, block)
+        return np.asarray(dot_z, dtype=float)[..., np.newaxis, :] + radius * directions
+
+    def scaled_points(self, dot_z, num_points, radius, min_vals, max_vals, block=None):
+        """
+        Points at distance radius from dot_z with directions stretched by the
+        range of each objective, see generate_neighborhood_scaled_points.
+
+        Returns:
+        numpy.ndarray: Points with shape (num_points, k), or (m, num_points, k)
+        for a batch of m vectors dot_z.
+        """
+        directions = self.samples(num_points, block) * (
+            (np.asarray(max_vals) - np.asarray(min_vals)) / 2
+        )
+        directions /= np.linalg.norm(directions, axis=1)[:, np.newaxis]
+        return np.asarray(dot_z, dtype=float)[..., np.newaxis, :] + radius * directions
+
+
+@functools.lru_cache(maxsize=None)
+def get_neighborhood_sampler(k, method="lhs", seed=None):
+    """Shared NeighborhoodSampler of each number of objectives."""
+    return NeighborhoodSampler(k, method=method, seed=seed)
+
+
+def generate_neighborhood_lhs_points(dot_z, num_points, radius, sampler=None):
     """
     Generate points in the neighborhood of dot_z using LHS sampling.
 
@@ -73,28 +211,20 @@ def generate_neighborhood_lhs_points(dot_z, num_points, radius):
     dot_z (numpy.ndarray): Current objective vector.
     num_points (int): Number of points to generate.
     radius (float): Radius of the neighborhood.
+    sampler (NeighborhoodSampler): Sampler of the directions, defaults to the
+        shared LHS sampler of the number of objectives.
 
     Returns:
     numpy.ndarray: Array of points in the neighborhood of dot_z.
     """
-    k = len(dot_z)  # Number of objectives
+    if sampler is None:
+        sampler = get_neighborhood_sampler(len(dot_z))
+    return sampler.points(dot_z, num_points, radius)
 
-    # Generate LHS samples in the range [-1, 1] for each dimension
-    sampler = qmc.LatinHypercube(d=k)
-    lhs_points = sampler.random(num_points) * 2 - 1  # Scale to [-1, 1]
 
-    # Normalize the points to ensure they lie within the radius
-    norm = np.linalg.norm(lhs_points, axis=1)
-    lhs_points = lhs_points / norm[:, np.newaxis]  # Normalize to unit sphere
-    lhs_points = lhs_points * radius  # Scale to the given radius
-
-    # Translate points to be centered around dot_z
-    points = lhs_points + dot_z
-
-    return points
-
-
-def generate_neighborhood_scaled_points(dot_z, num_points, radius, min_vals, max_vals):
+def generate_neighborhood_scaled_points(
+    dot_z, num_points, radius, min_vals, max_vals, sampler=None
+):
     """
     Generate points in the neighborhood of dot_z with consideration for max and min values of each dimension.
 
@@ -104,39 +234,23 @@ def generate_neighborhood_scaled_points(dot_z, num_points, radius, min_vals, max
     radius (float): Radius of the neighborhood.
     min_vals (numpy.ndarray): Minimum values for each dimension.
     max_vals (numpy.ndarray): Maximum values for each dimension.
+    sampler (NeighborhoodSampler): Sampler of the directions, defaults to the
+        shared LHS sampler of the number of objectives.
 
     Returns:
     numpy.ndarray: Array of points in the neighborhood of dot_z.
     """
-    k = len(dot_z)  # Number of objectives
-
-    # Generate LHS samples in the range [-1, 1] for each dimension
-    sampler = qmc.LatinHypercube(d=k)
-    lhs_points = sampler.random(num_points) * 2 - 1  # Scale to [-1, 1]
-
-    # Scale the points to fit within the ranges of each dimension
-    for i in range(k):
-        range_size = max_vals[i] - min_vals[i]
-        lhs_points[:, i] = lhs_points[:, i] * (range_size / 2)
-
-    # Normalize the points to lie within the unit sphere
-    norm = np.linalg.norm(lhs_points, axis=1)
-    lhs_points = lhs_points / norm[:, np.newaxis]  # Normalize to unit sphere
-
-    # Scale points to lie within the specified radius
-    lhs_points = lhs_points * radius  # Scale to the given radius
-
-    # Translate points to be centered around dot_z
-    points = lhs_points + dot_z
-
-    return points
+    if sampler is None:
+        sampler = get_neighborhood_sampler(len(dot_z))
+    return sampler.scaled_points(dot_z, num_points, radius, min_vals, max_vals)
 
 
 def compute_approximate_pareto_optimal_objective_vectors(
     dot_z, lambdas, z_values, weights
 ):
     """
-    Compute the approximate Pareto optimal objective vector.
+    Compute the approximate Pareto optimal objective vectors of all the points
+    in the neighborhood of dot_z at once.
 
     Args:
     dot_z (numpy.ndarray): Current objective vector.
@@ -147,38 +261,16 @@ def compute_approximate_pareto_optimal_objective_vectors(
     Returns:
     numpy.ndarray: Array of approximate Pareto optimal objective vectors.
     """
-    k = len(dot_z)  # Number of objectives
-    w_inv = 1 / np.array(weights)
-    n = -np.array([lambdas[i] * weights[i] for i in range(k)])
-    d = np.array(z_values) - dot_z  # Direction vectors from dot_z to z_values
-    w_inv = np.array(w_inv)
-    n = np.array(n)
-
-    # Compute the trade-off vectors for each point z
-    t_values = []
-    for d_vector in d:
-        t = -np.dot(n.T, d_vector) / np.dot(n.T, w_inv)
-        t_values.append(t)
-
-    # Compute approximate z for each point z
-    approximate_z_values = []
-    for i in range(len(z_values)):
-        approximate_z = dot_z + d[i] + t_values[i] * w_inv
-        approximate_z_values.append(approximate_z)
-
-    approximate_z_values = np.array(approximate_z_values)
-
-    slope, intercept, r_value, p_value, std_err = stats.linregress(
-        approximate_z_values[:, 1], approximate_z_values[:, 3]
-    )
-    slope2, intercept, r_value, p_value, std_err = stats.linregress(
-        approximate_z_values[:, 3], approximate_z_values[:, 1]
-    )
+    dot_z = np.asarray(dot_z, dtype=float)
+    z_values = np.asarray(z_values, dtype=float)
+    w_inv = 1 / np.asarray(weights, dtype=float)
+    n = -np.asarray(lambdas, dtype=float) * np.asarray(weights, dtype=float)
 
-    print("slope 01", slope)
-    print("slope 10", slope2)
+    # t = -n.(z - dot_z) / n.w_inv for all the points with one matrix product
+    t_values = (np.dot(n, dot_z) - z_values @ n) / np.dot(n, w_inv)
 
-    return approximate_z_values
+    # approximate z = dot_z + d + t * w_inv, where dot_z + d = z
+    return z_values + t_values[:, np.newaxis] * w_inv
 
 
 def compute_approximate_pareto_optimal_objective_vector(
@@ -200,88 +292,130 @@ def compute_approximate_pareto_optimal_objective_vector(
     w_inv = 1 / np.array(weights)
     n = -np.array([lambdas[i] * weights[i] for i in range(k)])
     local_trade_off = -(lambdas[1] * weights[1]) / (lambdas[0] * weights[0])
-    print("Local trade off", local_trade_off)
-    # d = np.zeros(len(new_reference_point))
     d = np.array(new_reference_point) - np.array(dot_z)
 
-    for i in range(0, len(new_reference_point)):
-        if new_reference_point[i] > dot_z[i]:
-            print("improve objective ", i)
-
-        elif new_reference_point[i] < dot_z[i]:
-            print("impair", i)
-
-        else:
-            print("keep the same", i)
-
-    print("dot_z", dot_z)
-    print("potential", new_reference_point)
-    print("new ref_point", np.array(dot_z) + d)
-
-    d = np.array(d)
     n = np.array(n)
     w_inv = np.array(w_inv)
     t = -np.dot(n.T, d) / np.dot(n.T, w_inv)
     approximate_z = dot_z + d + t * w_inv
-    print("d", d)
-    print("Approximated z", approximate_z)
+    log_event(
+        logger,
+        "approximate_solution",
+        local_trade_off=local_trade_off,
+        dot_z=dot_z,
+        potential=new_reference_point,
+        d=d,
+        approximate_z=approximate_z,
+    )
     return approximate_z
 
 
-# Function to compute slope using SVD
-def compute_slope_svd(difference_matrix):
-    # Check the rank of the difference matrix
-    rank = matrix_rank(difference_matrix)
-    print(f"Rank of the Difference Matrix: {rank}")
+def compute_slope_svd(difference_matrix, tolerance=1e-10):
+    """
+    Estimate the normal of the hyperplane spanned by the rows of a difference
+    matrix from a single SVD.
+
+    The normal is the right singular vector of the smallest singular value,
+    i.e. the unit direction along which the differences vary the least. It is
+    oriented so that its components sum to a positive value, like the
+    multipliers of a front of a minimization problem.
+
+    Args:
+    difference_matrix (numpy.ndarray): Differences with shape (m, k), or a
+        batch of difference matrices with shape (n, m, k).
+    tolerance (float): Singular values below tolerance times the largest one
+        do not count for the effective rank.
 
-    # Perform SVD
-    U, s, Vt = svd(difference_matrix, full_matrices=False)
+    Returns:
+    TangentHyperplane: The unit normal with shape (k,), the effective rank of
+    the difference matrix and its min(m, k) singular values, with a leading
+    dimension n for a batch. The hyperplane is only determined when the
+    effective rank is k - 1; with a lower rank the normal is one of the
+    unit vectors orthogonal to the differences.
+    """
+    difference_matrix = np.asarray(difference_matrix, dtype=float)
+    m, k = difference_matrix.shape[-2:]
+    # With fewer differences than objectives the thin SVD has no vector
+    # orthogonal to the differences
+    _, s, Vt = svd(difference_matrix, full_matrices=m < k)
 
-    # Tolerance to determine numerical stability
-    tolerance = 1e-10
-    s_inv = np.array([1 / si if si > tolerance else 0 for si in s])
+    normal = Vt[..., -1, :]
+    sign = np.where(np.sum(normal, axis=-1, keepdims=True) < 0, -1.0, 1.0)
+    effective_rank = np.sum(s > tolerance * s[..., :1], axis=-1)
+    return TangentHyperplane(normal * sign, effective_rank, s)
 
-    # Create the diagonal matrix for singular values
-    S_inv = np.diag(s_inv)
 
-    # Compute the pseudo-inverse
-    A_pseudo_inv = Vt.T @ S_inv @ U.T
+def compute_difference_matrix(solutions, origin=None):
+    """
+    Compute the differences between solutions and an origin.
 
-    # Solve for slope (assuming b = 0)
-    b = np.zeros(difference_matrix.shape[0])
-    slope = A_pseudo_inv @ b
+    Args:
+    solutions (numpy.ndarray): Objective vectors with shape (m, k), or a
+        batch with shape (n, m, k).
+    origin (numpy.ndarray): Origin of the differences with shape (k,), or
+        (n, k). Defaults to the first solution, which is then left out.
 
-    # Check for rank deficiency
-    tolerance = 1e-10
-    effective_rank = np.sum(s > tolerance)
-    print(f"Effective Rank (considering tolerance): {effective_rank}")
+    Returns:
+    numpy.ndarray: Differences with shape (m, k), or (m - 1, k) without origin.
+    """
+    solutions = np.asarray(solutions, dtype=float)
+    if origin is None:
+        return solutions[..., 1:, :] - solutions[..., :1, :]
+    return solutions - np.asarray(origin, dtype=float)[..., np.newaxis, :]
 
-    if effective_rank < difference_matrix.shape[1]:
-        print("The difference matrix is rank deficient.")
-    else:
-        print("The difference matrix is not rank deficient.")
 
-    return slope
+def construct_tangent_hyperplane(target_solution, neighbors, tolerance=1e-10):
+    """
+    Estimate the tangent hyperplane of a front at a solution from its
+    neighbours on the front.
 
+    Args:
+    target_solution (numpy.ndarray): Objective vector with shape (k,), or a
+        batch with shape (n, k).
+    neighbors (numpy.ndarray): Neighbouring objective vectors on the front,
+        with shape (m, k), or (n, m, k).
+    tolerance (float): See compute_slope_svd.
 
-# Compute difference matrix
-def compute_difference_matrix(solutions):
-    num_solutions = solutions.shape[0]
-    diff_matrix = np.zeros((num_solutions - 1, solutions.shape[1]))
+    Returns:
+    TangentHyperplane: See compute_slope_svd.
+    """
+    difference_matrix = compute_difference_matrix(neighbors, target_solution)
+    return compute_slope_svd(difference_matrix, tolerance)
 
-    for i in range(num_solutions - 1):
-        diff_matrix[i] = (
-            solutions[i + 1] - solutions[0]
-        )  # Difference from the first solution
 
-    return diff_matrix
+def estimate_tangent_hyperplanes(index, targets, num_neighbors=None, tolerance=1e-10):
+    """
+    Estimate the tangent hyperplanes of a discrete front at a batch of
+    solutions from their nearest neighbours on the front.
 
+    The differences are taken in the normalized objective space of the index,
+    so objectives of different magnitudes are equally well conditioned, and
+    the normals are mapped back to the original objective space.
 
-def construct_tangent_hyperplane(target_solution, neighbors):
+    Args:
+    index (FrontIndex): Index of the front.
+    targets (numpy.ndarray): Objective vectors with shape (k,), or (n, k).
+    num_neighbors (int): Number of nearest neighbours per target, defaults
+        to 2 * k.
+    tolerance (float): See compute_slope_svd.
 
-    # Compute difference matrix A (each row is the difference between a neighbor and the target)
-    A = compute_difference_matrix(neighbors)
+    Returns:
+    TangentHyperplane: See compute_slope_svd.
+    """
+    targets = np.asarray(targets, dtype=float)
+    k = targets.shape[-1]
+    if num_neighbors is None:
+        num_neighbors = 2 * k
+
+    # A target on the front is its own nearest neighbour, with difference zero
+    _, neighbor_indices = index.query(targets, k=num_neighbors + 1)
+    hyperplane = construct_tangent_hyperplane(
+        index.normalize(targets),
+        index.normalized_objectives[neighbor_indices],
+        tolerance,
+    )
 
-    slope = compute_slope_svd(A)
-    print("Slope svd", slope)
-    return slope
+    # n'.(z - min) / scale = c is the hyperplane n.z = c' with n = n' / scale
+    normal = hyperplane.normal / index.scale
+    normal /= np.linalg.norm(normal, axis=-1, keepdims=True)
+    return hyperplane._replace(normal=normal)
@@ -0,0 +1,225 @@
+import numpy as np
+from desdeo_problem import MOProblem
+
+from explainable_moo.core.lime_explanations.kkt_multipliers import (
+    compute_multipliers,
+    compute_multipliers_batch,
+)
+from explainable_moo.utils.initweight import initweight
+from explainable_moo.utils.utils import Normalizer
+
+
+def atlas_filename(problem_id):
+    """Name of the atlas file of a problem in the atlas directory of the API."""
+    return f"{problem_id}.npz"
+
+
+class MultiplierAtlas:
+    """
+    Precomputed solutions and Lagrange multipliers over a lattice of weight vectors.
+
+    Every lattice point is the solution of the ASF problem with the ideal point
+    as reference point, so together they cover the Pareto front. The atlas is
+    a warm-start table: a query with any reference point and weights starts
+    its solve from the lattice point with the smallest ASF value for that
+    query. The lattice point is returned without solving only when the query
+    lies on its ASF ray, i.e. all its ASF terms are equal within tol, which
+    in practice only happens for queries at the ideal point with lattice
+    weights. Nearby lattice points are not accepted as approximate answers:
+    their multipliers belong to a different set of active constraints than
+    those of most queries.
+
+    Args:
+    weights (numpy.ndarray): Weight vectors with shape (n, k).
+    x (numpy.ndarray): Decision vectors with shape (n, num_variables).
+    fx (numpy.ndarray): Objective vectors with shape (n, k).
+    lagrange_multipliers (numpy.ndarray): Multipliers with shape (n, k).
+    ideal (numpy.ndarray): Ideal point used for normalization.
+    nadir (numpy.ndarray): Nadir point used for normalization.
+    """
+
+    def __init__(self, weights, x, fx, lagrange_multipliers, ideal, nadir):
+        self.weights = np.asarray(weights, dtype=float)
+        self.x = np.asarray(x, dtype=float)
+        self.fx = np.asarray(fx, dtype=float)
+        self.lagrange_multipliers = np.asarray(lagrange_multipliers, dtype=float)
+        self.ideal = np.asarray(ideal, dtype=float)
+        self.nadir = np.asarray(nadir, dtype=float)
+
+        self.normalizer = Normalizer(self.ideal, self.nadir)
+        self._normalized_fx = self.normalizer.normalize(self.fx)
+
+    @classmethod
+    def build(
+        cls,
+        problem: MOProblem,
+        ideal,
+        nadir,
+        num_weights=500,
+        backend="scipy",
+        evaluator=None,
+    ):
+        """
+        Solve the ASF problem for every weight vector of a simplex lattice.
+
+        Args:
+        problem (MOProblem): Problem to be solved.
+        ideal (numpy.ndarray): Ideal point, used as reference point.
+        nadir (numpy.ndarray): Nadir point used for normalization.
+        num_weights (int): Minimum number of lattice points, see initweight.
+        backend (str): Solver backend, see compute_multipliers.
+        evaluator (callable): Evaluator for the scipy backend.
+
+        Returns:
+        MultiplierAtlas: The atlas of the problem.
+        """
+        weights = initweight(problem.n_of_objectives, num_weights).T
+        normalizer = Normalizer(ideal, nadir)
+        reference_points = np.tile(normalizer.min_value, (len(weights), 1))
+
+        x, lagrange_multipliers = compute_multipliers_batch(
+            problem,
+            weights,
+            reference_points,
+            ideal,
+            nadir,
+            backend=backend,
+            evaluator=evaluator,
+            normalizer=normalizer,
+        )
+        fx = problem.evaluate(x).objectives
+
+        return cls(weights, x, fx, lagrange_multipliers, ideal, nadir)
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            x=self.x,
+            fx=self.fx,
+            lagrange_multipliers=self.lagrange_multipliers,
+            ideal=self.ideal,
+            nadir=self.nadir,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["weights"],
+                data["x"],
+                data["fx"],
+                data["lagrange_multipliers"],
+                data["ideal"],
+                data["nadir"],
+            )
+
+    def __len__(self):
+        return len(self.weights)
+
+    def nearest(self, z_dot, w):
+        """
+        Find the lattice point with the smallest ASF value for a query.
+
+        Args:
+        z_dot (numpy.ndarray): Reference point.
+        w (list): Weights for the objectives.
+
+        Returns:
+        tuple: Index of the lattice point and the spread (max - min) of its
+        ASF terms, which is zero when it solves the query exactly.
+        """
+        w = np.asarray(w, dtype=float)
+        terms = w * (self._normalized_fx - self.normalizer.normalize(z_dot))
+        asf_values = np.max(terms, axis=1)
+        index = int(np.argmin(asf_values))
+        spread = asf_values[index] - np.min(terms[index])
+        return index, spread
+
+    def multipliers_for(self, index, w):
+        """
+        Multipliers of the lattice point for other weights.
+
+        The stationarity condition sum(mu_i * w_i * grad f_i) = 0 holds at the
+        same point for mu_i proportional to lambda_i * w_lattice_i / w_i.
+        """
+        lagrange_multipliers = (
+            self.lagrange_multipliers[index] * self.weights[index] / np.asarray(w)
+        )
+        total = np.sum(lagrange_multipliers)
+        if total > 0:
+            lagrange_multipliers = lagrange_multipliers / total
+        return lagrange_multipliers
+
+    def solve(
+        self, problem: MOProblem, z_dot, w, tol=1e-4, evaluator=None, max_time=None
+    ):
+        """
+        Solve a query with the scipy backend, warm started from the nearest
+        lattice point, or return the lattice point when it solves the query.
+
+        Args:
+        problem (MOProblem): Problem the atlas was built for.
+        z_dot (numpy.ndarray): Reference point.
+        w (list): Weights for the objectives.
+        tol (float): Largest spread of the ASF terms accepted without refinement.
+        evaluator (callable): Evaluator for the scipy backend.
+        max_time (float): Time limit of the solve in seconds, see compute_multipliers.
+
+        Returns:
+        tuple: Decision vector and Lagrange multipliers.
+        """
+        index, spread = self.nearest(z_dot, w)
+        if spread <= tol:
+            return self.x[index], self.multipliers_for(index, w)
+
+        return compute_multipliers(
+            problem,
+            w,
+            z_dot,
+            self.ideal,
+            self.nadir,
+            backend="scipy",
+            evaluator=evaluator,
+            x0=self.x[index],
+            normalizer=self.normalizer,
+            max_time=max_time,
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    from desdeo_problem.problem import DiscreteDataProblem
+
+    from explainable_moo.api import optimization_problems
+
+    parser = argparse.ArgumentParser(
+        description="Build the multiplier atlas of a problem served by the API."
+    )
+    parser.add_argument("problem_id", type=int, help="Id of the problem in the API")
+    parser.add_argument(
+        "output_dir",
+        help="Directory of the atlases, to be passed as EXPLAINABLE_MOO_ATLAS_DIR",
+    )
+    parser.add_argument("--num-weights", type=int, default=500)
+    args = parser.parse_args()
+
+    entry = optimization_problems[args.problem_id]
+    if isinstance(entry["definition"], DiscreteDataProblem):
+        parser.error(f"Problem {args.problem_id} is discrete and needs no atlas.")
+
+    atlas = MultiplierAtlas.build(
+        entry["definition"],
+        entry["ideal"],
+        entry["nadir"],
+        num_weights=args.num_weights,
+        evaluator=entry.get("evaluator"),
+    )
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, atlas_filename(args.problem_id))
+    atlas.save(path)
+    print(
+        f"Saved the atlas of problem {args.problem_id} with {len(atlas)} points to {path}"
+    )
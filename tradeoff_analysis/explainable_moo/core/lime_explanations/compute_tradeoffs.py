@@ -3,8 +3,6 @@ from scipy.stats import qmc
 from scipy.optimize import approx_fprime
 from explainable_moo.utils.utils import get_min_max
 
-from scipy import stats
-
 
 def asf(fx, w, z_dot):
     values = []
@@ -14,49 +12,52 @@ def asf(fx, w, z_dot):
 
 
 def compute_tradeoffs_slope(z_values):
-
-    n_objectives = len(z_values[0])
-    partial_trade_offs = np.ones((n_objectives, n_objectives))
-
-    for i in range(n_objectives):
-        for j in range(n_objectives):
-            if i != j:
-                slope, intercept, r_value, p_value, std_err = stats.linregress(
-                    z_values[:, i], z_values[:, j]
-                )
-                partial_trade_offs[i][j] = slope
-
+    """
+    Compute the partial trade-offs as the slopes of the least squares lines
+    fitted between every pair of objectives.
+
+    The slope of objective j against objective i is cov(z_i, z_j) / var(z_i),
+    so all the pairs come from a single covariance matrix.
+
+    Args:
+    z_values (numpy.ndarray): Objective vectors with shape (m, k), or a batch
+        of sets of objective vectors with shape (n, m, k).
+
+    Returns:
+    numpy.ndarray: Partial trade-offs with shape (k, k), or (n, k, k).
+    """
+    z_values = np.asarray(z_values, dtype=float)
+    centered = z_values - np.mean(z_values, axis=-2, keepdims=True)
+    covariance = np.einsum("...mi,...mj->...ij", centered, centered)
+    variance = np.diagonal(covariance, axis1=-2, axis2=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        partial_trade_offs = covariance / variance[..., :, np.newaxis]
+
+    n_objectives = z_values.shape[-1]
+    partial_trade_offs[..., np.arange(n_objectives), np.arange(n_objectives)] = 1
     return partial_trade_offs
 
 
 def compute_tradeoffs_objectives(lambdas, w, objectives):
+    """
+    Compute the partial trade-offs -lambda_j / lambda_i between all the pairs
+    of objectives: gaining one unit in i impairs j in trade-off units.
+
+    Args:
+    lambdas (numpy.ndarray): Lagrange multipliers with shape (k,), or a batch
+        of multiplier vectors with shape (n, k).
+    w (list): Weights for the objectives.
+    objectives (list): Objectives of the problem.
+
+    Returns:
+    numpy.ndarray: Partial trade-offs with shape (k, k), or (n, k, k).
+    """
     n_objectives = len(objectives)
-    partial_trade_offs = np.ones((n_objectives, n_objectives))
-    # trade_off_with_original_values = np.ones((n_objectives, n_objectives))
-    # norm_objectives = (np.array(fx) - np.min(fx)) / (np.max(fx) - np.min(fx))
-    # normalized_multipliers = (lambdas - np.min(lambdas)) / (np.max(lambdas) - np.min(lambdas))
-    # min_value, max_value = get_min_max(ideal, nadir)
-
-    w_inv = 1 / np.array(w)
-    w_inv = np.array(w_inv)
-    # print (norm_objectives)
-    for i in range(n_objectives):
-        # lambda_i = lambdas[i] * (max_value[i] - min_value[i]) + min_value[i]
-        lambda_i = lambdas[i]
-        for j in range(n_objectives):
-            if i != j:
-                # lambda_j = lambdas[j] * (max_value[j] - min_value[j]) + min_value[j]
-                lambda_j = lambdas[j]
-                # print(np.array(x))
-                # tradeoff = (np.linalg.norm(lambdas[i] * gradient_i)) / (
-                #    np.linalg.norm(lambdas[j] * gradient_j)
-                # )
-                # Gaining one unit in i impairs j in tradeoff units
-                tradeoff = -(lambda_j) / (lambda_i)
-                partial_trade_offs[i][j] = tradeoff
-
-                # trade_off_with_original_values[i][j] = tradeoff * (fx[j] / fx[i])
-                # print(f"Trade-off between x{i+1} and x{j+1}: {trade_off_with_original_values}")
-                # print(lambdas)
-                # print(tradeoff)
+    lambdas = np.asarray(lambdas, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        partial_trade_offs = -lambdas[..., np.newaxis, :] / lambdas[..., :, np.newaxis]
+
+    partial_trade_offs[..., np.arange(n_objectives), np.arange(n_objectives)] = 1
     return partial_trade_offs
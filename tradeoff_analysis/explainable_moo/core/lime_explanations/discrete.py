@@ -0,0 +1,78 @@
+import numpy as np
+
+from explainable_moo.core.lime_explanations.approximate_solutions import (
+    construct_tangent_hyperplane,
+)
+
+
+def explain_front_point(index, reference_point, w, num_neighbors=None):
+    """
+    Explain a reference point with a discrete Pareto front instead of solving
+    the ASF problem.
+
+    The reference point is projected to the point of the front minimizing the
+    ASF. At the solution of the ASF problem the vector of lambda_i * w_i is
+    normal to the front in the normalized objective space, and lambda_i is
+    zero for the objectives whose ASF term is not active. The multipliers are
+    therefore estimated from the tangent hyperplane of the front, fitted to
+    the nearest neighbours of the point, restricted to the objectives whose
+    ASF term is within twice the spacing of the neighbours from the maximum:
+    the point is off the exact solution by up to the spacing, so two active
+    terms can differ by up to twice that.
+
+    Args:
+    index (FrontIndex): Index of the front.
+    reference_point (numpy.ndarray): Reference point with shape (k,).
+    w (list): Weights for the objectives.
+    num_neighbors (int): Number of nearest neighbours, defaults to 2 * k.
+
+    Returns:
+    tuple: Index of the selected point of the front, its Lagrange multipliers
+    (nonnegative, summing to 1) and the effective rank of the neighbourhood
+    in the active objectives.
+    """
+    w = np.asarray(w, dtype=float)
+    k = len(w)
+    if num_neighbors is None:
+        num_neighbors = 2 * k
+
+    point, _ = index.asf_nearest(reference_point, w)
+    target = index.normalized_objectives[point]
+    # The point is its own nearest neighbour, with difference zero
+    distances, neighbors = index.tree.query(target, k=num_neighbors + 1)
+
+    terms = w * (target - index.normalize(reference_point))
+    active = terms >= np.max(terms) - 2 * np.max(w) * distances[-1]
+
+    hyperplane = construct_tangent_hyperplane(
+        target[active], index.normalized_objectives[neighbors][:, active]
+    )
+    lambdas = np.zeros(k)
+    lambdas[active] = np.clip(hyperplane.normal, 0, None) / w[active]
+    if np.sum(lambdas) == 0:
+        lambdas[active] = 1 / w[active]
+    return point, lambdas / np.sum(lambdas), hyperplane.effective_rank
+
+
+def explain_front_points(index, reference_points, w, num_neighbors=None):
+    """
+    Explain a batch of reference points with explain_front_point.
+
+    Args:
+    index (FrontIndex): Index of the front.
+    reference_points (numpy.ndarray): Reference points with shape (n, k).
+    w (list): Weights for the objectives.
+    num_neighbors (int): See explain_front_point.
+
+    Returns:
+    tuple: Indices of the selected points with shape (n,), their Lagrange
+    multipliers with shape (n, k) and the effective ranks with shape (n,).
+    """
+    explanations = [
+        explain_front_point(index, reference_point, w, num_neighbors)
+        for reference_point in np.atleast_2d(reference_points)
+    ]
+    if not explanations:
+        return np.empty(0, dtype=int), np.empty((0, len(w))), np.empty(0, dtype=int)
+    points, lambdas, ranks = zip(*explanations)
+    return np.array(points), np.array(lambdas), np.array(ranks)
@@ -1,14 +1,23 @@
+import itertools
+import logging
+import threading
+import time
+import weakref
 from typing import Union
 from gekko import GEKKO
 import numpy as np
-from explainable_moo.utils.utils import (
-    normalize_objectives,
-    normalize_reference_point,
-    parse_objectives,
-)
+from scipy.optimize import minimize, nnls
+from explainable_moo.utils.instrumentation import log_event, span
+from explainable_moo.utils.utils import Normalizer
 
 from desdeo_problem import MOProblem
 
+logger = logging.getLogger(__name__)
+
+
+class SolverError(RuntimeError):
+    """Raised when the ASF problem of a reference point could not be solved."""
+
 
 def normalize(value, min_val, max_val):
     # Normalize values to be between 0 and 1
@@ -30,41 +39,110 @@ def get_scalar_value(value: Union[float, np.ndarray]) -> float:
         raise TypeError("Expected a float or ndarray, but got something else.")
 
 
-def compute_multipliers(problem: MOProblem, w, z_dot, ideal, nadir):
+def compute_multipliers(
+    problem: MOProblem,
+    w,
+    z_dot,
+    ideal,
+    nadir,
+    backend="gekko",
+    evaluator=None,
+    x0=None,
+    normalizer=None,
+    max_time=None,
+):
+    """
+    Solve the ASF problem for a reference point and compute the Lagrange multipliers.
+
+    Args:
+    problem (MOProblem): Problem to be solved.
+    w (list): Weights for the objectives.
+    z_dot (numpy.ndarray): Reference point.
+    ideal (numpy.ndarray): Ideal point used for normalization.
+    nadir (numpy.ndarray): Nadir point used for normalization.
+    backend (str): "gekko" to solve with GEKKO (its run directory is removed
+        after the multipliers are read) or "scipy" to solve with SLSQP and
+        recover the multipliers of the active constraints by least squares,
+        entirely in memory.
+    evaluator (callable): Only used by the scipy backend. Vectorized evaluator
+        returning the objective values and their Jacobians, such as
+        problems.river_pollution_evaluator(). Defaults to forward differences.
+    x0 (numpy.ndarray): Only used by the scipy backend. Starting point of the
+        solver, defaults to the initial values of the variables. A solve that
+        fails from x0 is retried once from the initial values.
+    normalizer (Normalizer): Normalizer of ideal and nadir, built from them
+        when not given.
+    max_time (float): Time limit of the solve in seconds, passed to GEKKO as
+        MAX_TIME. The scipy backend raises TimeoutError when the limit is
+        exceeded.
+
+    Returns:
+    tuple: Decision vector and Lagrange multipliers.
+
+    Raises:
+    SolverError: If the solver failed, e.g. it hit its iteration limit.
+    """
+    if normalizer is None:
+        normalizer = Normalizer(ideal, nadir)
+    if backend == "gekko":
+        return _compute_multipliers_gekko(problem, w, z_dot, normalizer, max_time)
+    elif backend == "scipy":
+        return _compute_multipliers_scipy(
+            problem,
+            w,
+            z_dot,
+            normalizer,
+            evaluator=evaluator,
+            x0=x0,
+            max_time=max_time,
+        )
+    else:
+        raise ValueError(f"Unknown backend '{backend}', expected 'gekko' or 'scipy'.")
+
+
+def _compute_multipliers_gekko(problem: MOProblem, w, z_dot, normalizer, max_time=None):
     num_variables = problem.n_of_variables
     lower_bounds = problem.get_variable_lower_bounds()
     upper_bounds = problem.get_variable_upper_bounds()
-    # Initial guess for alpha and variables
-    m = GEKKO(remote=False)
-
-    alpha = m.Var(value=0)  # Variable alpha
-    x = m.Array(m.Var, num_variables)
-
-    for i in range(num_variables):
-        x[i].lower = lower_bounds[i]
-        x[i].upper = upper_bounds[i]
-
-    m.Obj(alpha)  # Objective function to minimize
-    num_objectives = problem.n_of_objectives
-
-    # Normalize objectives and z_dot using ideal and nadir points
-    # normalized_objectives = normalize_objectives(problem, ideal, nadir)
-    normalized_z_dot = normalize_reference_point(z_dot, ideal, nadir)
-    parsed_objectives = parse_objectives(problem, ideal, nadir)
-    # Define Constraints
-    for i in range(num_objectives):
-        # print(parsed_objectives[i]([0, 0])[0, 0])
-        m.Equation(
-            w[i] * (parsed_objectives[i](x)[0, 0] - normalized_z_dot[i]) <= alpha
-        )
+    with span("build_model"):
+        # Initial guess for alpha and variables
+        m = GEKKO(remote=False)
 
-    m.options.DIAGLEVEL = 2
+        alpha = m.Var(value=0)  # Variable alpha
+        x = m.Array(m.Var, num_variables)
+
+        for i in range(num_variables):
+            x[i].lower = lower_bounds[i]
+            x[i].upper = upper_bounds[i]
+
+        m.Obj(alpha)  # Objective function to minimize
+        num_objectives = problem.n_of_objectives
+
+        # Normalize objectives and z_dot using ideal and nadir points
+        # normalized_objectives = normalize_objectives(problem, ideal, nadir)
+        normalized_z_dot = normalizer.normalize(z_dot)
+        parsed_objectives = normalizer.parse_objectives(problem)
+        # Define Constraints
+        for i in range(num_objectives):
+            # print(parsed_objectives[i]([0, 0])[0, 0])
+            m.Equation(
+                w[i] * (parsed_objectives[i](x)[0, 0] - normalized_z_dot[i]) <= alpha
+            )
+
+        m.options.DIAGLEVEL = 2
+        if max_time is not None:
+            m.options.MAX_TIME = max_time
 
     # Minimize alpha subject to the constraints
-    m.solve(disp=False)
-    # print(f"Optimal value of alpha: {alpha.value[0]}")
-    # print("Lagrange multipliers")
-    lam = np.loadtxt(m.path + "/apm_lam.txt")
+    try:
+        with span("gekko_solve"):
+            _solve_gekko_model(m)
+        # print(f"Optimal value of alpha: {alpha.value[0]}")
+        # print("Lagrange multipliers")
+        with span("read_multipliers"):
+            lam = np.loadtxt(m.path + "/apm_lam.txt")
+    finally:
+        m.cleanup()
     lam *= -1
     # print(lam)
     # print("Value of x")
@@ -75,3 +153,392 @@ def compute_multipliers(problem: MOProblem, w, z_dot, ideal, nadir):
     # lagrange_multipliers[0:num_objectives] *= -1
     # lagrange_multipliers = result.grad[:-1]
     return np.array(flattened_x), lam
+
+
+def _solve_gekko_model(m):
+    try:
+        m.solve(disp=False)
+    except Exception as e:
+        # GEKKO reports a failed solve (e.g. "Solution Not Found" or an
+        # exceeded MAX_TIME) with a bare Exception
+        raise SolverError(f"GEKKO failed to solve the ASF problem: {e}") from e
+
+
+def finite_difference_evaluator(problem: MOProblem, step=1e-7):
+    """
+    Build a vectorized evaluator of the objectives and their Jacobians for
+    problems without analytic derivatives.
+
+    All the forward difference points of the batch are evaluated with a single
+    call to problem.evaluate. A variable whose forward step would exceed its
+    upper bound is differenced backward instead, so the problem is never
+    evaluated outside its bounds.
+
+    Args:
+    problem (MOProblem): Problem to be evaluated.
+    step (float): Relative step of the forward differences.
+
+    Returns:
+    callable: Evaluator mapping decision vectors with shape (n, num_variables)
+    to objective values (n, k) and Jacobians (n, k, num_variables).
+    """
+    num_variables = problem.n_of_variables
+    upper_bounds = np.asarray(problem.get_variable_upper_bounds(), dtype=float)
+
+    def evaluator(x):
+        x = np.atleast_2d(np.asarray(x, dtype=float))
+        h = step * np.maximum(1, np.abs(x))
+        h = np.where(x + h > upper_bounds, -h, h)
+        points = np.repeat(x[:, np.newaxis, :], num_variables + 1, axis=1)
+        points[:, 1:, :] += h[:, np.newaxis, :] * np.eye(num_variables)
+        values = problem.evaluate(points.reshape(-1, num_variables)).objectives
+        values = values.reshape(len(x), num_variables + 1, -1)
+        fx = values[:, 0, :]
+        jacobian = (values[:, 1:, :] - fx[:, np.newaxis, :]) / h[:, :, np.newaxis]
+        return fx, np.swapaxes(jacobian, 1, 2)
+
+    return evaluator
+
+
+def _compute_multipliers_scipy(
+    problem: MOProblem,
+    w,
+    z_dot,
+    normalizer,
+    evaluator=None,
+    x0=None,
+    tol=1e-6,
+    max_time=None,
+):
+    num_variables = problem.n_of_variables
+    lower_bounds = np.asarray(problem.get_variable_lower_bounds(), dtype=float)
+    upper_bounds = np.asarray(problem.get_variable_upper_bounds(), dtype=float)
+    if evaluator is None:
+        evaluator = finite_difference_evaluator(problem)
+    initial_values = np.array(
+        [variable.initial_value for variable in problem.variables]
+    )
+
+    w = np.asarray(w, dtype=float)
+    normalized_z_dot = normalizer.normalize(z_dot)
+
+    # Objectives and Jacobians are evaluated together, once per iterate
+    cache = {}
+    deadline = None if max_time is None else time.perf_counter() + max_time
+
+    def evaluate(x):
+        key = x.tobytes()
+        if key not in cache:
+            # SLSQP evaluates the constraints on every iteration, so a solve
+            # past its deadline is stopped here
+            if deadline is not None and time.perf_counter() > deadline:
+                raise TimeoutError(f"The solve took longer than {max_time} s.")
+            cache.clear()
+            fx, jacobian = evaluator(x[np.newaxis, :])
+            cache[key] = (
+                normalizer.normalize(fx[0]),
+                normalizer.normalize_jacobian(jacobian[0]),
+            )
+        return cache[key]
+
+    # The decision vector is extended with alpha: y = (x, alpha) and
+    # alpha - w * (f(x) - z_dot) >= 0
+    def asf_constraints(y):
+        fx, _ = evaluate(y[:-1])
+        return y[-1] - w * (fx - normalized_z_dot)
+
+    def asf_constraints_jacobian(y):
+        _, jacobian = evaluate(y[:-1])
+        return np.hstack((-w[:, np.newaxis] * jacobian, np.ones((len(w), 1))))
+
+    gradient = np.zeros(num_variables + 1)
+    gradient[-1] = 1
+
+    def solve(x0):
+        x0 = np.clip(np.asarray(x0, dtype=float), lower_bounds, upper_bounds)
+        alpha_0 = np.max(w * (evaluate(x0)[0] - normalized_z_dot))
+        with span("scipy_solve"):
+            return minimize(
+                lambda y: y[-1],
+                np.append(x0, alpha_0),
+                jac=lambda y: gradient,
+                method="SLSQP",
+                constraints=[
+                    {
+                        "type": "ineq",
+                        "fun": asf_constraints,
+                        "jac": asf_constraints_jacobian,
+                    }
+                ],
+                bounds=list(
+                    zip(
+                        np.append(lower_bounds, -np.inf),
+                        np.append(upper_bounds, np.inf),
+                    )
+                ),
+            )
+
+    result = solve(initial_values if x0 is None else x0)
+    if not result.success and x0 is not None:
+        # SLSQP can fail from a warm start that is far from the solution, e.g.
+        # on the other side of a kink, so it is retried from the initial values
+        log_event(
+            logger,
+            "warm_start_failed",
+            level=logging.INFO,
+            reference_point=z_dot,
+            message=result.message,
+        )
+        result = solve(initial_values)
+    if not result.success:
+        raise SolverError(f"SLSQP failed to solve the ASF problem: {result.message}")
+
+    x = result.x[:-1]
+    with span("multiplier_recovery"):
+        lagrange_multipliers = _least_squares_multipliers(
+            x,
+            w,
+            normalized_z_dot,
+            *evaluate(x),
+            lower_bounds,
+            upper_bounds,
+            tol,
+        )
+    return x, lagrange_multipliers
+
+
+def _least_squares_multipliers(
+    x, w, normalized_z_dot, fx, jacobian, lower_bounds, upper_bounds, tol
+):
+    """
+    Recover the KKT multipliers of the ASF constraints at a solution.
+
+    Only the active constraints get a nonzero multiplier. The stationarity
+    conditions with respect to alpha (the multipliers sum to one) and to the
+    decision variables that are not at a bound are solved for the active
+    multipliers by nonnegative least squares.
+
+    The active constraints are the ASF terms within tol of the largest one,
+    not of the alpha returned by the solver, which may exceed it by more than
+    tol, so at least one constraint is always active.
+    """
+    terms = w * (fx - normalized_z_dot)
+    active = terms >= np.max(terms) - tol
+    free = (x - lower_bounds > tol) & (upper_bounds - x > tol)
+
+    A = np.vstack(
+        (np.ones((1, np.sum(active))), (w[active, None] * jacobian[active][:, free]).T)
+    )
+    b = np.zeros(len(A))
+    b[0] = 1
+
+    lagrange_multipliers = np.zeros(len(w))
+    lagrange_multipliers[active] = nnls(A, b)[0]
+    return lagrange_multipliers
+
+
+class ASFSolverSession:
+    """
+    Long-lived GEKKO model of the ASF epigraph problem of one MOProblem.
+
+    The weights and the normalized reference point are GEKKO parameters that
+    are updated in place, so the model is built only once and every solve is
+    warm started from the previous optimum. Every solve still writes the model
+    files and launches the external solver, which dominates its time, so a
+    session is not faster than compute_multipliers; use the scipy backend
+    where the solve time matters. The GEKKO run directory is removed by
+    close() or, at the latest, when the session is garbage collected.
+
+    Args:
+    problem (MOProblem): Problem to be solved.
+    ideal (numpy.ndarray): Ideal point used for normalization.
+    nadir (numpy.ndarray): Nadir point used for normalization.
+    normalizer (Normalizer): Normalizer of ideal and nadir, built from them
+        when not given.
+    """
+
+    def __init__(self, problem: MOProblem, ideal, nadir, normalizer=None):
+        self.problem = problem
+        self.ideal = ideal
+        self.nadir = nadir
+        self.normalizer = (
+            normalizer if normalizer is not None else Normalizer(ideal, nadir)
+        )
+        self._lock = threading.Lock()
+
+        num_variables = problem.n_of_variables
+        num_objectives = problem.n_of_objectives
+        lower_bounds = problem.get_variable_lower_bounds()
+        upper_bounds = problem.get_variable_upper_bounds()
+        m = GEKKO(remote=False)
+
+        alpha = m.Var(value=0)
+        x = m.Array(m.Var, num_variables)
+
+        for i in range(num_variables):
+            x[i].lower = lower_bounds[i]
+            x[i].upper = upper_bounds[i]
+
+        self.w_params = [
+            m.Param(value=1 / num_objectives) for _ in range(num_objectives)
+        ]
+        self.z_params = [m.Param(value=0) for _ in range(num_objectives)]
+
+        m.Obj(alpha)
+        parsed_objectives = self.normalizer.parse_objectives(problem)
+        for i in range(num_objectives):
+            m.Equation(
+                self.w_params[i] * (parsed_objectives[i](x)[0, 0] - self.z_params[i])
+                <= alpha
+            )
+
+        m.options.DIAGLEVEL = 2
+
+        self.model = m
+        self.alpha = alpha
+        self.x = x
+        self._finalizer = weakref.finalize(self, m.cleanup)
+
+    def close(self):
+        """Remove the GEKKO run directory of the session."""
+        self._finalizer()
+
+    def solve(self, w, z_dot):
+        """
+        Solve the ASF problem for new weights and reference point.
+
+        Args:
+        w (list): Weights for the objectives.
+        z_dot (numpy.ndarray): Reference point in the original objective space.
+
+        Returns:
+        tuple: Decision vector and Lagrange multipliers.
+
+        Raises:
+        SolverError: If GEKKO failed to solve the problem.
+        """
+        normalized_z_dot = self.normalizer.normalize(z_dot)
+        with self._lock:
+            for i in range(len(self.w_params)):
+                self.w_params[i].value = w[i]
+                self.z_params[i].value = normalized_z_dot[i]
+
+            with span("gekko_solve"):
+                _solve_gekko_model(self.model)
+            with span("read_multipliers"):
+                lam = np.loadtxt(self.model.path + "/apm_lam.txt")
+            lam *= -1
+            flattened_x = [xi.value[0] for xi in self.x]
+
+        return np.array(flattened_x), np.atleast_1d(lam)
+
+
+def compute_multipliers_batch(
+    problem: MOProblem,
+    W,
+    Z_dot,
+    ideal,
+    nadir,
+    backend="scipy",
+    evaluator=None,
+    normalizer=None,
+):
+    """
+    Compute the solutions and Lagrange multipliers for a batch of reference points.
+
+    With the scipy backend each solve is warm started from the previous
+    solution. The GEKKO backend solves the points one by one with an
+    ASFSolverSession, launching the external solver for every point.
+
+    Args:
+    problem (MOProblem): Problem to be solved.
+    W (numpy.ndarray): Weights, either one vector of shape (k,) shared by all
+        reference points or one vector per reference point with shape (n, k).
+    Z_dot (numpy.ndarray): Reference points with shape (n, k).
+    ideal (numpy.ndarray): Ideal point used for normalization.
+    nadir (numpy.ndarray): Nadir point used for normalization.
+    backend (str): "gekko" or "scipy", see compute_multipliers.
+    evaluator (callable): Evaluator for the scipy backend, see compute_multipliers.
+    normalizer (Normalizer): Normalizer of ideal and nadir, see compute_multipliers.
+
+    Returns:
+    tuple: Decision vectors with shape (n, num_variables) and Lagrange
+    multipliers with shape (n, k).
+    """
+    Z_dot = np.atleast_2d(np.asarray(Z_dot, dtype=float))
+    W = np.broadcast_to(np.asarray(W, dtype=float), Z_dot.shape)
+
+    X = np.zeros((len(Z_dot), problem.n_of_variables))
+    lams = np.zeros(Z_dot.shape)
+    solutions = iter_multipliers(
+        problem,
+        W,
+        Z_dot,
+        ideal,
+        nadir,
+        backend=backend,
+        evaluator=evaluator,
+        normalizer=normalizer,
+    )
+    for n, (x, lam) in enumerate(solutions):
+        X[n], lams[n] = x, lam
+
+    return X, lams
+
+
+def iter_multipliers(
+    problem: MOProblem,
+    W,
+    Z_dot,
+    ideal,
+    nadir,
+    backend="scipy",
+    evaluator=None,
+    normalizer=None,
+):
+    """
+    Lazily compute the solutions and Lagrange multipliers for a stream of
+    reference points, yielding each one as soon as its solve finishes.
+
+    Only one reference point is held at a time, so Z_dot can be any iterable,
+    e.g. a generator. The solver is set up as in compute_multipliers_batch
+    and released when the generator is exhausted or closed.
+
+    Args:
+    problem (MOProblem): Problem to be solved.
+    W (numpy.ndarray): Weights, either one vector of shape (k,) shared by all
+        reference points or an iterable with one vector per reference point.
+    Z_dot (iterable): Reference points.
+    ideal (numpy.ndarray): Ideal point used for normalization.
+    nadir (numpy.ndarray): Nadir point used for normalization.
+    backend (str): "gekko" or "scipy", see compute_multipliers.
+    evaluator (callable): Evaluator for the scipy backend, see compute_multipliers.
+    normalizer (Normalizer): Normalizer of ideal and nadir, see compute_multipliers.
+
+    Yields:
+    tuple: Decision vector and Lagrange multipliers.
+    """
+    if backend not in ("gekko", "scipy"):
+        raise ValueError(f"Unknown backend '{backend}', expected 'gekko' or 'scipy'.")
+    if np.ndim(W) == 1:
+        W = itertools.repeat(np.asarray(W, dtype=float))
+    if normalizer is None:
+        normalizer = Normalizer(ideal, nadir)
+
+    if backend == "gekko":
+        session = ASFSolverSession(problem, ideal, nadir, normalizer=normalizer)
+        try:
+            for w, z_dot in zip(W, Z_dot):
+                yield session.solve(w, z_dot)
+        finally:
+            session.close()
+    else:
+        if evaluator is None:
+            evaluator = finite_difference_evaluator(problem)
+        x0 = None
+        for w, z_dot in zip(W, Z_dot):
+            x, lam = _compute_multipliers_scipy(
+                problem, w, z_dot, normalizer, evaluator=evaluator, x0=x0
+            )
+            x0 = x
+            yield x, lam
@@ -0,0 +1,202 @@
+import logging
+import multiprocessing
+import os
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+
+import numpy as np
+
+from explainable_moo.core.lime_explanations.kkt_multipliers import (
+    ASFSolverSession,
+    SolverError,
+    compute_multipliers,
+)
+from explainable_moo.utils.instrumentation import log_event
+from explainable_moo.utils.utils import Normalizer
+
+logger = logging.getLogger(__name__)
+
+# State of a worker process, set once by _init_worker
+_worker_state = {}
+
+# Extra seconds granted to a chunk over its time limit before its worker is
+# considered hung
+HUNG_WORKER_GRACE = 10
+
+
+def _init_worker(problem_factory, ideal, nadir, backend, evaluator_factory, timeout):
+    problem = problem_factory()
+    _worker_state["problem"] = problem
+    _worker_state["ideal"] = ideal
+    _worker_state["nadir"] = nadir
+    _worker_state["normalizer"] = Normalizer(ideal, nadir)
+    _worker_state["backend"] = backend
+    _worker_state["timeout"] = timeout
+    _worker_state["evaluator"] = (
+        evaluator_factory() if evaluator_factory is not None else None
+    )
+    if backend == "gekko":
+        # Every worker owns its GEKKO model and run directory
+        session = ASFSolverSession(
+            problem, ideal, nadir, normalizer=_worker_state["normalizer"]
+        )
+        if timeout is not None:
+            session.model.options.MAX_TIME = timeout
+        _worker_state["session"] = session
+        # Worker processes do not run atexit handlers, remove the run
+        # directory when the worker shuts down
+        Finalize(session, session.close, exitpriority=10)
+
+
+def _solve_chunk(start, reference_points, weights):
+    problem = _worker_state["problem"]
+    X = np.full((len(reference_points), problem.n_of_variables), np.nan)
+    lams = np.full((len(reference_points), problem.n_of_objectives), np.nan)
+
+    for n in range(len(reference_points)):
+        try:
+            if _worker_state["backend"] == "gekko":
+                X[n], lams[n] = _worker_state["session"].solve(
+                    weights[n], reference_points[n]
+                )
+            else:
+                X[n], lams[n] = compute_multipliers(
+                    problem,
+                    weights[n],
+                    reference_points[n],
+                    _worker_state["ideal"],
+                    _worker_state["nadir"],
+                    backend=_worker_state["backend"],
+                    evaluator=_worker_state["evaluator"],
+                    normalizer=_worker_state["normalizer"],
+                    max_time=_worker_state["timeout"],
+                )
+        except (SolverError, TimeoutError) as e:
+            # A failed or timed out solve leaves its row as NaN, any other
+            # error is a bug and propagates
+            log_event(
+                logger,
+                "solve_failed",
+                level=logging.WARNING,
+                row=start + n,
+                error=str(e),
+            )
+
+    return X, lams
+
+
+def parallel_solve(
+    problem_factory,
+    reference_points,
+    weights,
+    ideal,
+    nadir,
+    n_workers=None,
+    chunksize=16,
+    timeout=None,
+    backend="gekko",
+    evaluator_factory=None,
+):
+    """
+    Solve the ASF problem for many reference points in a pool of processes.
+
+    Every worker builds its own problem instance with problem_factory (and its
+    own GEKKO session and run directory with the GEKKO backend). The reference
+    points are sent to the workers in chunks and the results are returned in
+    the order of the reference points.
+
+    Args:
+    problem_factory (callable): Picklable function returning the MOProblem,
+        e.g. problems.river_pollution_problem.
+    reference_points (numpy.ndarray): Reference points with shape (n, k).
+    weights (numpy.ndarray): Weights with shape (k,) or (n, k).
+    ideal (numpy.ndarray): Ideal point used for normalization.
+    nadir (numpy.ndarray): Nadir point used for normalization.
+    n_workers (int): Number of processes, defaults to the number of CPUs.
+    chunksize (int): Number of reference points sent to a worker at once.
+    timeout (float): Time limit in seconds per reference point, enforced by
+        the workers: it is passed to GEKKO as MAX_TIME and stops SLSQP after
+        the iteration in which it is exceeded. A worker whose chunk is not
+        back within timeout * chunksize + HUNG_WORKER_GRACE seconds is
+        considered hung: the pool is terminated, the chunk is given up and
+        the unfinished chunks are solved in a new pool.
+    backend (str): Solver backend, see compute_multipliers.
+    evaluator_factory (callable): Picklable function returning the evaluator
+        of the scipy backend, e.g. problems.river_pollution_evaluator.
+
+    Returns:
+    tuple: Decision vectors with shape (n, num_variables) and Lagrange
+    multipliers with shape (n, k). The rows of failed or timed out solves are
+    NaN and logged with their index. Any other error raised in a worker is
+    raised again here.
+    """
+    reference_points = np.atleast_2d(np.asarray(reference_points, dtype=float))
+    weights = np.broadcast_to(np.asarray(weights, dtype=float), reference_points.shape)
+    if n_workers is None:
+        n_workers = os.cpu_count()
+
+    X = np.full((len(reference_points), problem_factory().n_of_variables), np.nan)
+    lams = np.full(reference_points.shape, np.nan)
+
+    chunks = [
+        (start, min(start + chunksize, len(reference_points)))
+        for start in range(0, len(reference_points), chunksize)
+    ]
+    while chunks:
+        pool = Pool(
+            n_workers,
+            initializer=_init_worker,
+            initargs=(
+                problem_factory,
+                ideal,
+                nadir,
+                backend,
+                evaluator_factory,
+                timeout,
+            ),
+        )
+        results = [
+            (
+                start,
+                end,
+                pool.apply_async(
+                    _solve_chunk,
+                    (start, reference_points[start:end], weights[start:end]),
+                ),
+            )
+            for start, end in chunks
+        ]
+        chunks = []
+        hung = False
+        finished = False
+        try:
+            for start, end, result in results:
+                if hung:
+                    # Collect the chunks finished before the pool is
+                    # terminated and solve the others again
+                    if result.ready():
+                        X[start:end], lams[start:end] = result.get()
+                    else:
+                        chunks.append((start, end))
+                    continue
+                try:
+                    X[start:end], lams[start:end] = result.get(
+                        timeout=(
+                            None
+                            if timeout is None
+                            else timeout * (end - start) + HUNG_WORKER_GRACE
+                        )
+                    )
+                except multiprocessing.TimeoutError:
+                    hung = True
+            finished = True
+        finally:
+            if hung or not finished:
+                pool.terminate()
+            else:
+                # Let the workers exit normally so that they remove their
+                # GEKKO run directories
+                pool.close()
+            pool.join()
+
+    return X, lams
@@ -0,0 +1,88 @@
+from collections import namedtuple
+
+import numpy as np
+
+SurrogateExplanation = namedtuple(
+    "SurrogateExplanation", ["slopes", "intercepts", "fidelity", "weights"]
+)
+
+
+def kernel_weights(dot_z, z_values, kernel_width=None):
+    """
+    Compute the LIME exponential kernel weights of the points in the
+    neighborhood of dot_z.
+
+    The distances are measured after scaling every objective by its standard
+    deviation in the neighborhood, so objectives of different magnitudes count
+    the same.
+
+    Args:
+    dot_z (numpy.ndarray): Explained objective vector with shape (k,), or a
+        batch of objective vectors with shape (n, k).
+    z_values (numpy.ndarray): Points in the neighborhood with shape (m, k), or
+        (n, m, k) for a batch.
+    kernel_width (float): Width of the kernel, defaults to 0.75 * sqrt(k) as in LIME.
+
+    Returns:
+    numpy.ndarray: Weights with shape (m,), or (n, m).
+    """
+    dot_z = np.asarray(dot_z, dtype=float)
+    z_values = np.asarray(z_values, dtype=float)
+    if kernel_width is None:
+        kernel_width = 0.75 * np.sqrt(z_values.shape[-1])
+
+    scale = np.std(z_values, axis=-2, keepdims=True)
+    scale[scale == 0] = 1
+    distances = np.linalg.norm((z_values - dot_z[..., np.newaxis, :]) / scale, axis=-1)
+    return np.exp(-(distances**2) / kernel_width**2)
+
+
+def fit_local_surrogate(dot_z, z_values, kernel_width=None, weights=None):
+    """
+    Fit a weighted linear surrogate z_j = a_ij + b_ij * z_i between every pair
+    of objectives in the neighborhood of dot_z.
+
+    The weighted least squares problems of all the pairs (and of all the
+    solutions of a batch) are solved at once from the weighted covariance
+    matrix of the neighborhood: b_ij = cov_w(z_i, z_j) / var_w(z_i). The
+    fidelity of each fit is its weighted coefficient of determination R^2.
+
+    Args:
+    dot_z (numpy.ndarray): Explained objective vector with shape (k,), or a
+        batch of objective vectors with shape (n, k).
+    z_values (numpy.ndarray): Points in the neighborhood, e.g. approximate
+        Pareto optimal objective vectors, with shape (m, k), or (n, m, k).
+    kernel_width (float): See kernel_weights.
+    weights (numpy.ndarray): Weights of the points, computed with
+        kernel_weights when not given.
+
+    Returns:
+    SurrogateExplanation: The slopes b_ij (the partial trade-offs, like
+    compute_tradeoffs_slope) and intercepts a_ij with shape (k, k), the R^2
+    fidelity of each fit with shape (k, k) and the weights of the points. A
+    batch adds a leading dimension n to each.
+    """
+    z_values = np.asarray(z_values, dtype=float)
+    if weights is None:
+        weights = kernel_weights(dot_z, z_values, kernel_width)
+    weights = np.asarray(weights, dtype=float)
+    normalized_weights = weights / np.sum(weights, axis=-1, keepdims=True)
+
+    mean = np.einsum("...m,...mk->...k", normalized_weights, z_values)
+    centered = z_values - mean[..., np.newaxis, :]
+    covariance = np.einsum(
+        "...m,...mi,...mj->...ij", normalized_weights, centered, centered
+    )
+    variance = np.diagonal(covariance, axis1=-2, axis2=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slopes = covariance / variance[..., :, np.newaxis]
+        fidelity = slopes * covariance / variance[..., np.newaxis, :]
+    intercepts = mean[..., np.newaxis, :] - slopes * mean[..., :, np.newaxis]
+
+    n_objectives = z_values.shape[-1]
+    diagonal = np.arange(n_objectives)
+    slopes[..., diagonal, diagonal] = 1
+    intercepts[..., diagonal, diagonal] = 0
+    fidelity[..., diagonal, diagonal] = 1
+    return SurrogateExplanation(slopes, intercepts, fidelity, weights)
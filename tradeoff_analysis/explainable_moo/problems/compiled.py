@@ -0,0 +1,100 @@
+"""JIT-compiled evaluators of the built-in problems.
+
+They compute all the objectives, and optionally their Jacobians, of a batch of
+decision vectors in a single compiled loop. The formulas are the ones of
+problems.river_pollution_formulas and problems.car_crash_formulas compiled
+with numba, so called with a batch they return the same values as
+problems.river_pollution_evaluator and problems.car_crash_evaluator and can be
+passed to the scipy backend of compute_multipliers. Called with
+jacobian=False, they only return the objective values, e.g. to evaluate
+neighbourhood samples.
+"""
+
+import numpy as np
+from numba import njit
+
+from explainable_moo.problems import problems
+
+_river_pollution_formulas = njit(cache=True)(problems.river_pollution_formulas)
+_river_pollution_jacobian_formulas = njit(cache=True)(
+    problems.river_pollution_jacobian_formulas
+)
+_car_crash_formulas = njit(cache=True)(problems.car_crash_formulas)
+_car_crash_jacobian_formulas = njit(cache=True)(problems.car_crash_jacobian_formulas)
+
+
+@njit(cache=True)
+def _river_pollution_kernel(x, five_obj, with_jacobian):
+    n = x.shape[0]
+    k = 5 if five_obj else 4
+    fx = np.empty((n, k))
+    jacobian = np.zeros((n, k, 2)) if with_jacobian else np.zeros((0, k, 2))
+
+    for i in range(n):
+        values = _river_pollution_formulas(x[i, 0], x[i, 1])
+        for j in range(k):
+            fx[i, j] = values[j]
+
+        if with_jacobian:
+            rows = _river_pollution_jacobian_formulas(x[i, 0], x[i, 1])
+            for j in range(k):
+                for l in range(2):
+                    jacobian[i, j, l] = rows[j][l]
+
+    return fx, jacobian
+
+
+@njit(cache=True)
+def _car_crash_kernel(x, with_jacobian):
+    n = x.shape[0]
+    fx = np.empty((n, 3))
+    jacobian = np.zeros((n, 3, 5)) if with_jacobian else np.zeros((0, 3, 5))
+
+    for i in range(n):
+        values = _car_crash_formulas(x[i, 0], x[i, 1], x[i, 2], x[i, 3], x[i, 4])
+        for j in range(3):
+            fx[i, j] = values[j]
+
+        if with_jacobian:
+            rows = _car_crash_jacobian_formulas(
+                x[i, 0], x[i, 1], x[i, 2], x[i, 3], x[i, 4]
+            )
+            for j in range(3):
+                for l in range(5):
+                    jacobian[i, j, l] = rows[j][l]
+
+    return fx, jacobian
+
+
+def compiled_river_pollution_evaluator(five_obj: bool = False):
+    """
+    Compiled evaluator of the river pollution problem.
+
+    The returned callable maps decision vectors with shape (n, 2) to the
+    objective values (n, k) and the Jacobians (n, k, 2), or only to the
+    objective values when called with jacobian=False.
+    """
+
+    def evaluator(x: np.ndarray, jacobian: bool = True):
+        x = np.ascontiguousarray(np.atleast_2d(x), dtype=np.float64)
+        fx, jac = _river_pollution_kernel(x, five_obj, jacobian)
+        return (fx, jac) if jacobian else fx
+
+    return evaluator
+
+
+def compiled_car_crash_evaluator():
+    """
+    Compiled evaluator of the car crash problem.
+
+    The returned callable maps decision vectors with shape (n, 5) to the
+    objective values (n, 3) and the Jacobians (n, 3, 5), or only to the
+    objective values when called with jacobian=False.
+    """
+
+    def evaluator(x: np.ndarray, jacobian: bool = True):
+        x = np.ascontiguousarray(np.atleast_2d(x), dtype=np.float64)
+        fx, jac = _car_crash_kernel(x, jacobian)
+        return (fx, jac) if jacobian else fx
+
+    return evaluator
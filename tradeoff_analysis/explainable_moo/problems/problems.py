@@ -6,6 +6,8 @@ from desdeo_problem.problem import Variable
 from desdeo_problem.problem import ScalarObjective
 import pandas as pd
 
+from explainable_moo.utils.front_storage import load_front
+
 
 def river_pollution_problem(five_obj: bool = False):
     def f_1(x: np.ndarray) -> np.ndarray:
@@ -59,6 +61,81 @@ def river_pollution_problem(five_obj: bool = False):
     return mo_problem
 
 
+def river_pollution_formulas(x_1, x_2):
+    """
+    Objective values of the river pollution problem, the fifth objective
+    included, for scalar or array decision variables.
+
+    river_pollution_evaluator evaluates these formulas on arrays and
+    compiled.compiled_river_pollution_evaluator compiles them with numba, so
+    only arithmetic and numpy ufuncs supported by numba may be used here.
+
+    Returns:
+    tuple: The five objective values.
+    """
+    return (
+        -4.07 - 2.27 * x_1,
+        -2.60
+        - 0.03 * x_1
+        - 0.02 * x_2
+        - 0.01 / (1.39 - x_1**2)
+        - 0.30 / (1.39 - x_2**2),
+        -8.21 + 0.71 / (1.09 - x_1**2),
+        -0.96 + 0.96 / (1.09 - x_2**2),
+        np.maximum(np.abs(x_1 - 0.65), np.abs(x_2 - 0.65)),
+    )
+
+
+def river_pollution_jacobian_formulas(x_1, x_2):
+    """
+    Jacobian of river_pollution_formulas, see there. The fifth objective is
+    not smooth, a subgradient is returned for it.
+
+    Returns:
+    tuple: One tuple of partial derivatives per objective.
+    """
+    dev_1 = x_1 - 0.65
+    dev_2 = x_2 - 0.65
+    first = np.abs(dev_1) >= np.abs(dev_2)
+    return (
+        (-2.27, 0.0),
+        (
+            -0.03 - 0.02 * x_1 / (1.39 - x_1**2) ** 2,
+            -0.02 - 0.60 * x_2 / (1.39 - x_2**2) ** 2,
+        ),
+        (1.42 * x_1 / (1.09 - x_1**2) ** 2, 0.0),
+        (0.0, 1.92 * x_2 / (1.09 - x_2**2) ** 2),
+        (np.sign(dev_1) * first, np.sign(dev_2) * (1.0 - first)),
+    )
+
+
+def _stack_formulas(values, n):
+    # Array with shape (n, ...) from nested tuples of scalars and arrays of length n
+    if isinstance(values, tuple):
+        return np.stack([_stack_formulas(value, n) for value in values], axis=1)
+    return np.broadcast_to(np.asarray(values, dtype=float), (n,))
+
+
+def river_pollution_evaluator(five_obj: bool = False):
+    """
+    Vectorized evaluator of the river pollution problem.
+
+    The returned callable maps a batch of decision vectors with shape (n, 2) to
+    the objective values with shape (n, k) and the Jacobians with shape
+    (n, k, 2) in a single call, see river_pollution_formulas.
+    """
+    k = 5 if five_obj else 4
+
+    def evaluator(x: np.ndarray):
+        x = np.atleast_2d(x)
+        x_1, x_2 = x[:, 0], x[:, 1]
+        fx = river_pollution_formulas(x_1, x_2)[:k]
+        jacobian = river_pollution_jacobian_formulas(x_1, x_2)[:k]
+        return _stack_formulas(fx, len(x)), _stack_formulas(jacobian, len(x))
+
+    return evaluator
+
+
 def car_crash_problem():
     def f_1(x: np.ndarray) -> np.ndarray:
         x = np.atleast_2d(x)
@@ -122,11 +199,102 @@ def car_crash_problem():
     return mo_problem
 
 
+def car_crash_formulas(x_1, x_2, x_3, x_4, x_5):
+    """
+    Objective values of the car crash problem for scalar or array decision
+    variables, see river_pollution_formulas.
+
+    Returns:
+    tuple: The three objective values.
+    """
+    return (
+        1640.2823
+        + 2.3573285 * x_1
+        + 2.3220035 * x_2
+        + 4.5688768 * x_3
+        + 7.7213633 * x_4
+        + 4.4559504 * x_5,
+        6.5856
+        + 1.15 * x_1
+        - 1.0427 * x_2
+        + 0.9738 * x_3
+        + 0.8364 * x_4
+        - 0.3695 * x_1 * x_4
+        + 0.0861 * x_1 * x_5
+        + 0.3628 * x_2 * x_4
+        - 0.1106 * x_1**2
+        - 0.3437 * x_3**2
+        + 0.1764 * x_4**2,
+        -0.0551
+        + 0.0181 * x_1
+        + 0.1024 * x_2
+        + 0.0421 * x_3
+        - 0.0073 * x_1 * x_2
+        + 0.024 * x_2 * x_3
+        - 0.0118 * x_2 * x_4
+        - 0.0204 * x_3 * x_4
+        - 0.008 * x_3 * x_5
+        - 0.0241 * x_2**2
+        + 0.0109 * x_4**2,
+    )
+
+
+def car_crash_jacobian_formulas(x_1, x_2, x_3, x_4, x_5):
+    """
+    Jacobian of car_crash_formulas, see there.
+
+    Returns:
+    tuple: One tuple of partial derivatives per objective.
+    """
+    return (
+        (2.3573285, 2.3220035, 4.5688768, 7.7213633, 4.4559504),
+        (
+            1.15 - 0.3695 * x_4 + 0.0861 * x_5 - 0.2212 * x_1,
+            -1.0427 + 0.3628 * x_4,
+            0.9738 - 0.6874 * x_3,
+            0.8364 - 0.3695 * x_1 + 0.3628 * x_2 + 0.3528 * x_4,
+            0.0861 * x_1,
+        ),
+        (
+            0.0181 - 0.0073 * x_2,
+            0.1024 - 0.0073 * x_1 + 0.024 * x_3 - 0.0118 * x_4 - 0.0482 * x_2,
+            0.0421 + 0.024 * x_2 - 0.0204 * x_4 - 0.008 * x_5,
+            -0.0118 * x_2 - 0.0204 * x_3 + 0.0218 * x_4,
+            -0.008 * x_3,
+        ),
+    )
+
+
+def car_crash_evaluator():
+    """
+    Vectorized evaluator of the car crash problem.
+
+    The returned callable maps a batch of decision vectors with shape (n, 5) to
+    the objective values with shape (n, 3) and the Jacobians with shape
+    (n, 3, 5) in a single call, see car_crash_formulas.
+    """
+
+    def evaluator(x: np.ndarray):
+        x = np.atleast_2d(x)
+        fx = car_crash_formulas(*x.T)
+        jacobian = car_crash_jacobian_formulas(*x.T)
+        return _stack_formulas(fx, len(x)), _stack_formulas(jacobian, len(x))
+
+    return evaluator
+
+
 def discrete_river_pollution():
 
-    filename = (
-        os.path.abspath(os.getcwd()) + "/explainable_moo/data/river_pollution_10178.csv"
+    data_dir = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"
     )
+    # The front is memory-mapped when it has been converted with
+    # python -m explainable_moo.utils.front_storage data/river_pollution_10178.csv
+    converted = os.path.join(data_dir, "river_pollution_10178")
+    if os.path.isdir(converted):
+        return load_front(converted)
+
+    filename = os.path.join(data_dir, "river_pollution_10178.csv")
     df = pd.read_csv(filename)
     pareto_front = df.to_numpy()
 
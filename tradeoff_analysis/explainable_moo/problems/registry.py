@@ -0,0 +1,120 @@
+import importlib
+import json
+import threading
+
+import numpy as np
+
+from explainable_moo.utils.utils import Normalizer
+
+
+class UnknownProblemError(KeyError):
+    """Raised when a problem id is not registered."""
+
+
+class ProblemRegistry:
+    """
+    Registry of the problems served by the API, constructed lazily.
+
+    A problem is registered with a factory and its metadata (name, ideal,
+    nadir, multipliers, shortnames, ...). The factory is only called on the
+    first access to the problem, and the resulting entry, a dict with the
+    metadata plus the problem under "definition", is kept for later accesses.
+    The ideal and nadir points default to the ones of the problem when it
+    defines them, like DiscreteDataProblem does, and the entry gets the
+    Normalizer of the two under "normalizer". A ValueError is raised when the
+    ideal, nadir, multipliers or shortnames do not have one value per
+    objective.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, problem_id, factory, evaluator_factory=None, **metadata):
+        """
+        Register a problem.
+
+        Args:
+        problem_id (int): Id of the problem in the API requests.
+        factory (callable): Function returning the problem.
+        evaluator_factory (callable): Optional function returning the
+            vectorized evaluator of the scipy backend.
+        **metadata: Entries of the problem, such as name, ideal, nadir,
+            multipliers and shortnames.
+        """
+        with self._lock:
+            self._specs[problem_id] = (factory, evaluator_factory, metadata)
+            self._entries.pop(problem_id, None)
+
+    def load_config(self, path):
+        """
+        Register the problems of a JSON file mapping problem ids to specs, e.g.
+
+        {"4": {"name": "RPP5", "factory": "explainable_moo.problems.problems:river_pollution_problem",
+               "kwargs": {"five_obj": true}, "multipliers": [-1, -1, -1, -1, -1]}}
+
+        The optional "evaluator" names the factory of the vectorized evaluator
+        in the same module:function format.
+        """
+        with open(path) as f:
+            config = json.load(f)
+
+        for problem_id, spec in config.items():
+            spec = dict(spec)
+            factory = _import_function(spec.pop("factory"))
+            kwargs = spec.pop("kwargs", {})
+            evaluator = spec.pop("evaluator", None)
+            self.register(
+                int(problem_id),
+                lambda factory=factory, kwargs=kwargs: factory(**kwargs),
+                _import_function(evaluator) if evaluator is not None else None,
+                **spec,
+            )
+
+    def __contains__(self, problem_id):
+        return problem_id in self._specs
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def __getitem__(self, problem_id):
+        if problem_id in self._entries:
+            return self._entries[problem_id]
+
+        with self._lock:
+            if problem_id not in self._entries:
+                if problem_id not in self._specs:
+                    raise UnknownProblemError(problem_id)
+                factory, evaluator_factory, metadata = self._specs[problem_id]
+                self._entries[problem_id] = self._build(
+                    problem_id, factory, evaluator_factory, metadata
+                )
+        return self._entries[problem_id]
+
+    @staticmethod
+    def _build(problem_id, factory, evaluator_factory, metadata):
+        entry = dict(metadata)
+        problem = factory()
+        entry["definition"] = problem
+        for name in ("ideal", "nadir"):
+            if name in entry:
+                entry[name] = np.array(entry[name], dtype=float)
+            elif hasattr(problem, name):
+                entry[name] = np.array(getattr(problem, name), dtype=float)
+        for name in ("ideal", "nadir", "multipliers", "shortnames"):
+            if name in entry and len(entry[name]) != problem.n_of_objectives:
+                raise ValueError(
+                    f"Problem {problem_id} has {problem.n_of_objectives} objectives "
+                    f"but {len(entry[name])} values of {name}."
+                )
+        if "ideal" in entry and "nadir" in entry:
+            entry["normalizer"] = Normalizer(entry["ideal"], entry["nadir"])
+        if evaluator_factory is not None:
+            entry["evaluator"] = evaluator_factory()
+        return entry
+
+
+def _import_function(name):
+    module, function = name.split(":")
+    return getattr(importlib.import_module(module), function)
@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SolutionCache:
+    """
+    LRU cache of the solutions computed for a problem, a reference point and weights.
+
+    The reference point and the weights are rounded to decimal_places before
+    they are used as a key, so points that only differ beyond the precision
+    shown in the UI share the same entry.
+
+    Args:
+    maxsize (int): Maximum number of entries, the least recently used entry is
+        evicted when it is exceeded.
+    decimal_places (int): Number of decimal places kept in the keys.
+    path (str): Optional JSON file the cache is loaded from and saved to.
+    """
+
+    def __init__(self, maxsize=1024, decimal_places=5, path=None):
+        self.maxsize = maxsize
+        self.decimal_places = decimal_places
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def key(self, problem_id, reference_point, weights):
+        return (
+            problem_id,
+            tuple(
+                np.round(np.asarray(reference_point, dtype=float), self.decimal_places)
+            ),
+            tuple(np.round(np.asarray(weights, dtype=float), self.decimal_places)),
+        )
+
+    def get(self, problem_id, reference_point, weights):
+        """
+        Return the cached solution as a dict of arrays, or None on a miss.
+        """
+        key = self.key(problem_id, reference_point, weights)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, problem_id, reference_point, weights, solution):
+        """
+        Store a solution, a dict with the entries x, lagrange_multipliers, fx
+        and partial_tradeoffs.
+        """
+        key = self.key(problem_id, reference_point, weights)
+        with self._lock:
+            self._entries[key] = {
+                name: np.asarray(value) for name, value in solution.items()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def save(self):
+        """Write the entries to the JSON file given as path."""
+        if self.path is None:
+            return
+        with self._lock:
+            entries = [
+                {
+                    "problem_id": key[0],
+                    "reference_point": list(key[1]),
+                    "weights": list(key[2]),
+                    "solution": {
+                        name: value.tolist() for name, value in solution.items()
+                    },
+                }
+                for key, solution in self._entries.items()
+            ]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Read the entries from the JSON file given as path."""
+        with open(self.path) as f:
+            entries = json.load(f)
+        for entry in entries:
+            self.put(
+                entry["problem_id"],
+                entry["reference_point"],
+                entry["weights"],
+                entry["solution"],
+            )
@@ -0,0 +1,173 @@
+import argparse
+import importlib
+import os
+
+import numpy as np
+from desdeo_emo.EAs.NSGAIII import NSGAIII
+from desdeo_problem import MOProblem
+
+from explainable_moo.utils.front_storage import load_front, save_front
+from explainable_moo.utils.non_dominated import non_dominated_mask
+
+STATE_FILE = "generation_state.npz"
+
+
+def merge_archive(archive, candidates, block_size=256):
+    """
+    Merge candidate solutions into a non-dominated archive.
+
+    Args:
+    archive (tuple): Decision vectors, objective vectors and fitness (the
+        objectives to be minimized) of the archive.
+    candidates (tuple): Decision vectors, objective vectors and fitness of
+        the new solutions.
+    block_size (int): See non_dominated_mask.
+
+    Returns:
+    tuple: Decision vectors, objective vectors and fitness of the solutions
+    of both that are not dominated, without duplicates.
+    """
+    x, objectives, fitness = (
+        np.vstack((old, np.asarray(new, dtype=float)))
+        for old, new in zip(archive, candidates)
+    )
+    # The survivors of a generation are usually already in the archive
+    _, unique = np.unique(fitness, axis=0, return_index=True)
+    unique = np.sort(unique)
+    x, objectives, fitness = x[unique], objectives[unique], fitness[unique]
+
+    mask = non_dominated_mask(fitness, block_size)
+    return x[mask], objectives[mask], fitness[mask]
+
+
+def generate_front(
+    problem: MOProblem,
+    output_dir,
+    n_iterations=10,
+    n_gen_per_iter=100,
+    population_size=500,
+    resume=True,
+    block_size=256,
+):
+    """
+    Approximate the Pareto front of a problem with NSGA-III, snapshotting the
+    non-dominated archive to disk after every iteration.
+
+    After each iteration the population is merged into the archive of all the
+    non-dominated solutions found so far, which is written to output_dir in
+    the format of utils.front_storage (so it can be opened memory-mapped with
+    load_front), together with the population needed to resume the run. When
+    output_dir already has a snapshot and resume is set, the run continues
+    from it instead of starting over.
+
+    Args:
+    problem (MOProblem): Problem to be solved.
+    output_dir (str): Directory of the snapshots.
+    n_iterations (int): Total number of iterations of the run.
+    n_gen_per_iter (int): Number of generations per iteration.
+    population_size (int): Size of the NSGA-III population.
+    resume (bool): Continue from the snapshot in output_dir if there is one.
+    block_size (int): See non_dominated_mask.
+
+    Returns:
+    tuple: Decision vectors and objective vectors of the archive.
+    """
+    state_path = os.path.join(output_dir, STATE_FILE)
+    objective_names = problem.get_objective_names()
+    variable_names = problem.get_variable_names()
+
+    iteration = 0
+    population = None
+    archive = (
+        np.empty((0, problem.n_of_variables)),
+        np.empty((0, problem.n_of_objectives)),
+        np.empty((0, problem.n_of_objectives)),
+    )
+    if resume and os.path.exists(state_path):
+        with np.load(state_path) as state:
+            iteration = int(state["iteration"])
+            population = state["population"]
+            archive_fitness = state["archive_fitness"]
+        front = load_front(output_dir, mmap_mode=None)
+        archive = (front.decision_variables, front.objectives, archive_fitness)
+
+    if iteration >= n_iterations:
+        return archive[0], archive[1]
+
+    evolver = NSGAIII(
+        problem,
+        interact=False,
+        n_iterations=n_iterations - iteration,
+        n_gen_per_iter=n_gen_per_iter,
+        population_size=population_size,
+    )
+    if population is not None:
+        # Continue from the population of the snapshot instead of a new one
+        evolver.population.delete(np.arange(len(evolver.population.individuals)))
+        evolver.population.add(population)
+
+    evolver.start()
+    while evolver.continue_evolution():
+        evolver.iterate()
+        iteration += 1
+
+        archive = merge_archive(
+            archive,
+            (
+                evolver.population.individuals,
+                evolver.population.objectives,
+                evolver.population.fitness,
+            ),
+            block_size,
+        )
+        save_front(output_dir, archive[1], archive[0], objective_names, variable_names)
+        # The state is replaced last, a snapshot interrupted before this point
+        # is resumed from the previous iteration
+        with open(state_path + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                iteration=iteration,
+                population=evolver.population.individuals,
+                archive_fitness=archive[2],
+            )
+        os.replace(state_path + ".tmp", state_path)
+        print(f"Iteration {iteration}/{n_iterations}: {len(archive[0])} points")
+
+    return archive[0], archive[1]
+
+
+def _load_problem(name):
+    module, attribute = name.split(":")
+    problem = getattr(importlib.import_module(module), attribute)
+    return problem() if callable(problem) else problem
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Approximate a Pareto front with NSGA-III, resumably."
+    )
+    parser.add_argument(
+        "problem",
+        help="Problem or function returning it as module:name, e.g. "
+        "explainable_moo.problems.problems:river_pollution_problem",
+    )
+    parser.add_argument("output_dir", help="Directory of the snapshots")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--population", type=int, default=500)
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore an existing snapshot"
+    )
+    parser.add_argument("--csv", help="Also save the objectives of the front as CSV")
+    args = parser.parse_args()
+
+    _, objectives = generate_front(
+        _load_problem(args.problem),
+        args.output_dir,
+        n_iterations=args.iterations,
+        n_gen_per_iter=args.generations,
+        population_size=args.population,
+        resume=not args.restart,
+    )
+    if args.csv is not None:
+        np.savetxt(args.csv, objectives, delimiter=",")
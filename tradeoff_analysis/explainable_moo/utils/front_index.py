@@ -0,0 +1,139 @@
+import heapq
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from explainable_moo.utils.utils import get_min_max
+
+
+class FrontIndex:
+    """
+    Spatial index of a discrete Pareto front in the normalized objective space.
+
+    The KD-tree is built once per front. It answers k-nearest-neighbour queries
+    directly, and the point minimizing the ASF for a reference point and
+    weights with a best-first branch and bound over the bounding boxes of its
+    nodes, so only a few leaves of the front are evaluated per query.
+
+    Args:
+    objectives (numpy.ndarray): Objective vectors of the front with shape (n, k).
+    ideal (numpy.ndarray): Ideal point used for normalization, defaults to the
+        minimum of the front.
+    nadir (numpy.ndarray): Nadir point used for normalization, defaults to the
+        maximum of the front.
+    leafsize (int): Number of points in the leaves of the KD-tree.
+    """
+
+    def __init__(self, objectives, ideal=None, nadir=None, leafsize=64):
+        self.objectives = np.asarray(objectives, dtype=float)
+        if ideal is None:
+            ideal = np.min(self.objectives, axis=0)
+        if nadir is None:
+            nadir = np.max(self.objectives, axis=0)
+        self._min_value, self._max_value = get_min_max(ideal, nadir)
+        scale = self._max_value - self._min_value
+        self.scale = np.where(scale > 0, scale, 1)
+        self.normalized_objectives = self.normalize(self.objectives)
+
+        self.tree = cKDTree(self.normalized_objectives, leafsize=leafsize)
+        self._build_bounds()
+
+    @classmethod
+    def from_problem(cls, problem, leafsize=64):
+        """Build the index of the front stored in a DiscreteDataProblem."""
+        return cls(problem.objectives, problem.ideal, problem.nadir, leafsize)
+
+    def normalize(self, values):
+        return (np.asarray(values, dtype=float) - self._min_value) / self.scale
+
+    def _build_bounds(self):
+        # Flatten the nodes of the KD-tree into arrays with the children and
+        # the bounding box of the points below every node.
+        nodes = [self.tree.tree]
+        children = []
+        leaf_indices = []
+        position = 0
+        while position < len(nodes):
+            node = nodes[position]
+            if node.split_dim == -1:
+                children.append((-1, -1))
+                leaf_indices.append(node.indices)
+            else:
+                children.append((len(nodes), len(nodes) + 1))
+                leaf_indices.append(None)
+                nodes.extend((node.lesser, node.greater))
+            position += 1
+
+        k = self.normalized_objectives.shape[1]
+        lower = np.empty((len(nodes), k))
+        upper = np.empty((len(nodes), k))
+        # Children always come after their parent
+        for i in reversed(range(len(nodes))):
+            if leaf_indices[i] is not None:
+                points = self.normalized_objectives[leaf_indices[i]]
+                lower[i] = np.min(points, axis=0)
+                upper[i] = np.max(points, axis=0)
+            else:
+                lesser, greater = children[i]
+                lower[i] = np.minimum(lower[lesser], lower[greater])
+                upper[i] = np.maximum(upper[lesser], upper[greater])
+
+        self._children = children
+        self._leaf_indices = leaf_indices
+        self._lower = lower
+        self._upper = upper
+
+    def asf_nearest(self, z_dot, w):
+        """
+        Find the point of the front minimizing the ASF for a reference point.
+
+        Args:
+        z_dot (numpy.ndarray): Reference point in the original objective space.
+        w (list): Weights for the objectives.
+
+        Returns:
+        tuple: Index of the point in the front and its ASF value in the
+        normalized objective space.
+        """
+        w = np.asarray(w, dtype=float)
+        normalized_z_dot = self.normalize(z_dot)
+
+        best_index = -1
+        best_value = np.inf
+        # The ASF of any point in a box is at least the ASF of its lower corner
+        heap = [(np.max(w * (self._lower[0] - normalized_z_dot)), 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            if bound >= best_value:
+                break
+            indices = self._leaf_indices[node]
+            if indices is not None:
+                values = np.max(
+                    w * (self.normalized_objectives[indices] - normalized_z_dot), axis=1
+                )
+                i = np.argmin(values)
+                if values[i] < best_value:
+                    best_index = int(indices[i])
+                    best_value = float(values[i])
+            else:
+                for child in self._children[node]:
+                    child_bound = np.max(w * (self._lower[child] - normalized_z_dot))
+                    if child_bound < best_value:
+                        heapq.heappush(heap, (child_bound, child))
+
+        return best_index, best_value
+
+    def query(self, points, k=1):
+        """
+        Find the k nearest points of the front in the normalized objective space.
+
+        Args:
+        points (numpy.ndarray): Query points in the original objective space,
+            with shape (k_objectives,) or (n, k_objectives).
+        k (int): Number of neighbours.
+
+        Returns:
+        tuple: Euclidean distances in the normalized space and indices of the
+        neighbours, as returned by cKDTree.query.
+        """
+        return self.tree.query(self.normalize(points), k=k)
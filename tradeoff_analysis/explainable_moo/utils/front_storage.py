@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from desdeo_problem.problem import DiscreteDataProblem
+
+OBJECTIVES_FILE = "objectives.npy"
+DECISION_VARIABLES_FILE = "decision_variables.npy"
+METADATA_FILE = "metadata.json"
+
+
+class MappedDiscreteDataProblem(DiscreteDataProblem):
+    """
+    DiscreteDataProblem whose objectives and decision variables are arrays
+    opened by load_front, usually memory-mapped, instead of copies of a
+    DataFrame.
+
+    Args:
+    objectives (numpy.ndarray): Objective vectors with shape (n, k).
+    decision_variables (numpy.ndarray): Decision vectors with shape (n, num_variables).
+    variable_names (list): Names of the decision variables.
+    objective_names (list): Names of the objectives.
+    ideal (numpy.ndarray): Ideal point of the front.
+    nadir (numpy.ndarray): Nadir point of the front.
+    """
+
+    def __init__(
+        self,
+        objectives,
+        decision_variables,
+        variable_names,
+        objective_names,
+        ideal,
+        nadir,
+    ):
+        # DiscreteDataProblem.__init__ copies the columns of a DataFrame, so the
+        # same attributes are set here without copying the arrays
+        self.decision_variables = decision_variables
+        self.variable_names = list(variable_names)
+        self.objectives = objectives
+        self.objective_names = list(objective_names)
+        self.ideal = ideal
+        self.nadir = nadir
+        self.n_of_objectives = len(objective_names)
+
+
+def _count_rows(filename, header, chunksize):
+    # Rows as parsed by pandas, so blank lines are not counted
+    chunks = pd.read_csv(
+        filename, header=0 if header else None, usecols=[0], chunksize=chunksize
+    )
+    return sum(len(chunk) for chunk in chunks)
+
+
+def convert_front(
+    filename,
+    output_dir,
+    objective_names=None,
+    variable_names=None,
+    header=True,
+    chunksize=1_000_000,
+):
+    """
+    Convert a Pareto front stored as CSV to the binary format read by load_front.
+
+    The objectives and the decision variables are written to separate .npy
+    files in output_dir, together with a JSON file with the names of the
+    columns, the number of points and the ideal and nadir points of the front.
+    The CSV is read in chunks of rows, so fronts larger than the memory can
+    be converted.
+
+    Args:
+    filename (str): CSV file with one point of the front per row.
+    output_dir (str): Directory of the converted front, created if needed.
+    objective_names (list): Columns of the objectives, defaults to the
+        columns whose names start with "f".
+    variable_names (list): Columns of the decision variables, defaults to
+        the columns whose names start with "x".
+    header (bool): Whether the first row of the CSV has the column names. A
+        CSV without header has only objectives, named objective_names or
+        f_1, ..., f_k.
+    chunksize (int): Number of rows read at once.
+
+    Returns:
+    dict: Metadata of the converted front.
+    """
+    num_points = _count_rows(filename, header, chunksize)
+    chunks = pd.read_csv(
+        filename, header=0 if header else None, chunksize=chunksize, dtype=float
+    )
+
+    os.makedirs(output_dir, exist_ok=True)
+    objectives = variables = None
+    ideal = nadir = None
+    start = 0
+    for chunk in chunks:
+        if not header:
+            if objective_names is None:
+                objective_names = [f"f_{i + 1}" for i in range(chunk.shape[1])]
+            chunk.columns = objective_names
+            variable_names = []
+        if objectives is None:
+            columns = [str(column) for column in chunk.columns]
+            if objective_names is None:
+                objective_names = [c for c in columns if c.lower().startswith("f")]
+            if variable_names is None:
+                variable_names = [c for c in columns if c.lower().startswith("x")]
+            if not objective_names:
+                raise ValueError(
+                    f"{filename} has no objective columns, pass objective_names "
+                    "or header=False for a CSV without header."
+                )
+            objectives = np.lib.format.open_memmap(
+                os.path.join(output_dir, OBJECTIVES_FILE),
+                mode="w+",
+                dtype=np.float64,
+                shape=(num_points, len(objective_names)),
+            )
+            variables = np.lib.format.open_memmap(
+                os.path.join(output_dir, DECISION_VARIABLES_FILE),
+                mode="w+",
+                dtype=np.float64,
+                shape=(num_points, len(variable_names)),
+            )
+            ideal = np.full(len(objective_names), np.inf)
+            nadir = np.full(len(objective_names), -np.inf)
+
+        end = start + len(chunk)
+        chunk_objectives = chunk[objective_names].to_numpy()
+        objectives[start:end] = chunk_objectives
+        variables[start:end] = chunk[variable_names].to_numpy()
+        ideal = np.minimum(ideal, np.min(chunk_objectives, axis=0))
+        nadir = np.maximum(nadir, np.max(chunk_objectives, axis=0))
+        start = end
+
+    if objectives is None:
+        raise ValueError(f"{filename} has no points.")
+    objectives.flush()
+    variables.flush()
+
+    return _write_metadata(
+        output_dir, objective_names, variable_names, num_points, ideal, nadir
+    )
+
+
+def _write_metadata(
+    output_dir, objective_names, variable_names, num_points, ideal, nadir
+):
+    metadata = {
+        "objective_names": list(objective_names),
+        "variable_names": list(variable_names),
+        "num_points": int(num_points),
+        "ideal": np.asarray(ideal, dtype=float).tolist(),
+        "nadir": np.asarray(nadir, dtype=float).tolist(),
+    }
+    path = os.path.join(output_dir, METADATA_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return metadata
+
+
+def save_front(
+    output_dir, objectives, decision_variables, objective_names, variable_names
+):
+    """
+    Save a front held in memory in the format read by load_front.
+
+    Every file is first written under a temporary name and then renamed, so a
+    front being overwritten, e.g. a snapshot, is never left half written.
+
+    Args:
+    output_dir (str): Directory of the front, created if needed.
+    objectives (numpy.ndarray): Objective vectors with shape (n, k).
+    decision_variables (numpy.ndarray): Decision vectors with shape (n, num_variables).
+    objective_names (list): Names of the objectives.
+    variable_names (list): Names of the decision variables.
+
+    Returns:
+    dict: Metadata of the saved front.
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    os.makedirs(output_dir, exist_ok=True)
+    for filename, values in (
+        (OBJECTIVES_FILE, objectives),
+        (DECISION_VARIABLES_FILE, decision_variables),
+    ):
+        path = os.path.join(output_dir, filename)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, np.asarray(values, dtype=np.float64))
+        os.replace(path + ".tmp", path)
+
+    return _write_metadata(
+        output_dir,
+        objective_names,
+        variable_names,
+        len(objectives),
+        np.min(objectives, axis=0),
+        np.max(objectives, axis=0),
+    )
+
+
+def load_front(path, mmap_mode="r"):
+    """
+    Open a front converted by convert_front.
+
+    With the default mmap_mode the arrays are memory-mapped read only: the
+    points are read from disk on demand and the pages are shared by all the
+    processes opening the same front.
+
+    Args:
+    path (str): Directory of the converted front.
+    mmap_mode (str): Passed to numpy.load, None loads the arrays into memory.
+
+    Returns:
+    MappedDiscreteDataProblem: The front as a discrete problem.
+    """
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+
+    return MappedDiscreteDataProblem(
+        np.load(os.path.join(path, OBJECTIVES_FILE), mmap_mode=mmap_mode),
+        np.load(os.path.join(path, DECISION_VARIABLES_FILE), mmap_mode=mmap_mode),
+        metadata["variable_names"],
+        metadata["objective_names"],
+        np.array(metadata["ideal"]),
+        np.array(metadata["nadir"]),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert a Pareto front from CSV to memory-mappable .npy files."
+    )
+    parser.add_argument("filename", help="CSV file of the front")
+    parser.add_argument(
+        "output_dir",
+        nargs="?",
+        help="Directory of the converted front, defaults to the CSV path without extension",
+    )
+    parser.add_argument(
+        "--no-header",
+        action="store_true",
+        help="The CSV has no header and only objective columns",
+    )
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    metadata = convert_front(
+        args.filename,
+        args.output_dir or os.path.splitext(args.filename)[0],
+        header=not args.no_header,
+        chunksize=args.chunksize,
+    )
+    print(f"Converted {metadata['num_points']} points of {args.filename}")
@@ -1,7 +1,8 @@
-from desdeo_emo.EAs.NSGAIII import NSGAIII
 import numpy as np
 from desdeo_problem.problem import MOProblem, ScalarObjective, variable_builder
 
+from explainable_moo.utils.front_generation import generate_front
+
 import numpy as np
 
 
@@ -49,18 +50,15 @@ f3 = ScalarObjective(name="f3", evaluator=f_3)
 list_objs = [f1, f2, f3]
 
 problem = MOProblem(variables=list_vars, objectives=list_objs)
-evolver = NSGAIII(
-    problem,
-    interact=False,
-    n_iterations=1,
-    n_gen_per_iter=200,
-    population_size=500,
-)
-
-evolver.start()
-while evolver.continue_evolution():
-    evolver.iterate()
-
-individuals, solutions, _ = evolver.end()
-
-np.savetxt("paper_front.csv", solutions, delimiter=",")
+if __name__ == "__main__":
+    # The front is snapshotted to paper_front/ after every iteration and an
+    # interrupted run is resumed from there, see front_generation.py
+    _, solutions = generate_front(
+        problem,
+        "paper_front",
+        n_iterations=1,
+        n_gen_per_iter=200,
+        population_size=500,
+    )
+
+    np.savetxt("paper_front.csv", solutions, delimiter=",")
@@ -1,8 +1,9 @@
 from desdeo_problem import Variable
-from desdeo_emo.EAs.NSGAIII import NSGAIII
 import numpy as np
 from desdeo_problem.problem import MOProblem, ScalarObjective, variable_builder
 
+from explainable_moo.utils.front_generation import generate_front
+
 
 # create the problem
 def f_1(x):
@@ -34,18 +35,15 @@ variables = [x_1, x_2]
 
 problem = MOProblem(variables=variables, objectives=objectives)
 
-evolver = NSGAIII(
-    problem,
-    interact=False,
-    n_iterations=10,
-    n_gen_per_iter=200,
-    population_size=500,
-)
-
-evolver.start()
-while evolver.continue_evolution():
-    evolver.iterate()
-
-individuals, solutions, _ = evolver.end()
-
-np.savetxt("data.csv", solutions, delimiter=",")
+if __name__ == "__main__":
+    # The front is snapshotted to river_pollution_front/ after every iteration and an
+    # interrupted run is resumed from there, see front_generation.py
+    _, solutions = generate_front(
+        problem,
+        "river_pollution_front",
+        n_iterations=10,
+        n_gen_per_iter=200,
+        population_size=500,
+    )
+
+    np.savetxt("data.csv", solutions, delimiter=",")
@@ -1,7 +1,8 @@
-from desdeo_emo.EAs.NSGAIII import NSGAIII
 import numpy as np
 from desdeo_problem.problem import MOProblem, ScalarObjective, variable_builder
 
+from explainable_moo.utils.front_generation import generate_front
+
 import numpy as np
 
 
@@ -84,18 +85,15 @@ varsl = variable_builder(
     upper_bounds=[3.0, 3.0, 3.0, 3.0, 3.0],
 )
 problem = MOProblem(variables=varsl, objectives=objectives)
-evolver = NSGAIII(
-    problem,
-    interact=False,
-    n_iterations=1,
-    n_gen_per_iter=200,
-    population_size=500,
-)
-
-evolver.start()
-while evolver.continue_evolution():
-    evolver.iterate()
-
-individuals, solutions, _ = evolver.end()
+if __name__ == "__main__":
+    # The front is snapshotted to car_front/ after every iteration and an
+    # interrupted run is resumed from there, see front_generation.py
+    _, solutions = generate_front(
+        problem,
+        "car_front",
+        n_iterations=1,
+        n_gen_per_iter=200,
+        population_size=500,
+    )
 
-np.savetxt("car_front.csv", solutions, delimiter=",")
+    np.savetxt("car_front.csv", solutions, delimiter=",")
@@ -0,0 +1,203 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencySummary:
+    """
+    Durations of one stage: total count and sum, and the last max_samples
+    durations from which the quantiles are computed.
+    """
+
+    def __init__(self, max_samples=4096):
+        self.count = 0
+        self.sum = 0.0
+        self._samples = deque(maxlen=max_samples)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self._samples.append(seconds)
+
+    def quantiles(self, quantiles=QUANTILES):
+        if not self._samples:
+            return [float("nan")] * len(quantiles)
+        return np.quantile(np.fromiter(self._samples, dtype=float), quantiles).tolist()
+
+
+class _Span:
+    __slots__ = ("_metrics", "_stage", "_start")
+
+    def __init__(self, metrics, stage):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.observe(self._stage, time.perf_counter() - self._start)
+        return False
+
+
+_NO_SPAN = contextlib.nullcontext()
+
+
+class Metrics:
+    """
+    Latency of the stages of the explanation pipeline.
+
+    Code is instrumented with `with metrics.span("stage"):`. The durations
+    are aggregated per stage and rendered in the Prometheus text format as a
+    summary with the quantiles p50, p95 and p99, plus any registered gauges
+    and counters.
+    When disabled, span() returns a shared no-op context manager.
+
+    Args:
+    namespace (str): Prefix of the metric names.
+    enabled (bool): Whether spans are recorded.
+    max_samples (int): Number of recent durations per stage kept for the quantiles.
+    """
+
+    def __init__(self, namespace="explainable_moo", enabled=True, max_samples=4096):
+        self.namespace = namespace
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self._summaries = {}
+        self._gauges = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage):
+        """Context manager recording the duration of its block under stage."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, stage)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            summary = self._summaries.get(stage)
+            if summary is None:
+                summary = self._summaries[stage] = LatencySummary(self.max_samples)
+            summary.observe(seconds)
+
+    def gauge(self, name, function, description=""):
+        """Register a gauge whose value is read from function() on rendering."""
+        self._gauges[name] = (function, description)
+
+    def counter(self, name, function, description=""):
+        """
+        Register a counter, a value that only increases (or is reset to zero),
+        read from function() on rendering. It is exported as name_total.
+        """
+        self._counters[name] = (function, description)
+
+    def summaries(self):
+        """
+        Return the quantiles, count and sum of the durations of every stage
+        as a dict {stage: {"p50": ..., "p95": ..., "p99": ..., "count": ..., "sum": ...}}.
+        """
+        with self._lock:
+            items = [
+                (stage, summary.quantiles(), summary.count, summary.sum)
+                for stage, summary in self._summaries.items()
+            ]
+        return {
+            stage: {
+                **{f"p{round(q * 100)}": v for q, v in zip(QUANTILES, quantiles)},
+                "count": count,
+                "sum": total,
+            }
+            for stage, quantiles, count, total in items
+        }
+
+    def render(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        name = f"{self.namespace}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Duration of the stages of the explanation pipeline.",
+            f"# TYPE {name} summary",
+        ]
+        for stage, summary in sorted(self.summaries().items()):
+            for q in QUANTILES:
+                value = summary[f"p{round(q * 100)}"]
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {value!r}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {summary["sum"]!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {summary["count"]}')
+
+        for gauge, (function, description) in sorted(self._gauges.items()):
+            gauge = f"{self.namespace}_{gauge}"
+            lines.append(f"# HELP {gauge} {description}")
+            lines.append(f"# TYPE {gauge} gauge")
+            lines.append(f"{gauge} {float(function())!r}")
+
+        for counter, (function, description) in sorted(self._counters.items()):
+            counter = f"{self.namespace}_{counter}_total"
+            lines.append(f"# HELP {counter} {description}")
+            lines.append(f"# TYPE {counter} counter")
+            lines.append(f"{counter} {float(function())!r}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Metrics of the process, disabled with EXPLAINABLE_MOO_METRICS=0
+metrics = Metrics(enabled=os.environ.get("EXPLAINABLE_MOO_METRICS", "1") != "0")
+
+
+def span(stage):
+    """Span of the process-wide metrics, see Metrics.span."""
+    return metrics.span(stage)
+
+
+def log_event(logger, event, level=logging.DEBUG, **fields):
+    """
+    Log an event with structured fields, e.g.
+    log_event(logger, "solution", reference_point=rp, fx=fx).
+
+    Nothing is formatted unless the logger is enabled for the level, so
+    events in the hot path cost one level check when logging is off.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Format records as one JSON object per line with their structured fields."""
+
+    def format(self, record):
+        document = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        return json.dumps(document, default=_to_json)
+
+
+def configure_logging(level):
+    """Send the logs of explainable_moo to stderr as structured JSON lines."""
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter())
+    logger = logging.getLogger("explainable_moo")
+    logger.addHandler(handler)
+    logger.setLevel(level)
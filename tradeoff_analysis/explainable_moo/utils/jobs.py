@@ -0,0 +1,89 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is saturated."""
+
+
+class JobQueue:
+    """
+    Bounded pool of worker threads running solver jobs.
+
+    Jobs are identified by a job id. A job submitted with the key of a job
+    that is still pending or running is coalesced with it and gets the same
+    job id. When max_pending jobs are already waiting or running, new jobs are
+    refused with QueueFullError. The results of the last max_finished jobs
+    are kept for polling.
+
+    Args:
+    max_workers (int): Number of jobs running at the same time.
+    max_pending (int): Maximum number of jobs waiting or running.
+    max_finished (int): Number of finished jobs whose results are kept.
+    """
+
+    def __init__(self, max_workers=4, max_pending=64, max_finished=1024):
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._in_flight = {}
+        self._finished = OrderedDict()
+
+    @property
+    def depth(self):
+        """Number of jobs waiting or running."""
+        return len(self._in_flight)
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Submit fn(*args, **kwargs) and return the id of its job.
+
+        Raises:
+        QueueFullError: If max_pending jobs are already waiting or running.
+        """
+        with self._lock:
+            if key in self._in_flight:
+                return self._in_flight[key]
+            if len(self._in_flight) >= self.max_pending:
+                raise QueueFullError(
+                    f"{len(self._in_flight)} jobs are already waiting or running."
+                )
+
+            job_id = uuid.uuid4().hex
+            self._in_flight[key] = job_id
+            future = self._executor.submit(fn, *args, **kwargs)
+            self._futures[job_id] = future
+
+        future.add_done_callback(lambda _: self._finish(key, job_id))
+        return job_id
+
+    def _finish(self, key, job_id):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._finished[job_id] = True
+            while len(self._finished) > self.max_finished:
+                old_job_id, _ = self._finished.popitem(last=False)
+                self._futures.pop(old_job_id, None)
+
+    def future(self, job_id):
+        """Return the future of a job, or None if the job id is unknown."""
+        return self._futures.get(job_id)
+
+    def status(self, job_id):
+        """
+        Return the state of a job as a dict with the entry status, one of
+        "pending", "running", "done" or "failed", plus result or error once
+        the job has finished. Returns None if the job id is unknown.
+        """
+        future = self._futures.get(job_id)
+        if future is None:
+            return None
+        if not future.done():
+            return {"status": "running" if future.running() else "pending"}
+        if future.exception() is not None:
+            return {"status": "failed", "error": str(future.exception())}
+        return {"status": "done", "result": future.result()}
@@ -0,0 +1,134 @@
+import bisect
+
+import numpy as np
+
+
+def _weakly_dominated_by(points, others, earlier_only=False):
+    """
+    Mask of the points for which at least one of the others is smaller or equal
+    in every objective. With earlier_only, others are the points themselves
+    and only the ones before each point are considered.
+    """
+    if len(others) == 0:
+        return np.zeros(len(points), dtype=bool)
+    less_equal = others[np.newaxis, :, 0] <= points[:, np.newaxis, 0]
+    for j in range(1, points.shape[1]):
+        less_equal &= others[np.newaxis, :, j] <= points[:, np.newaxis, j]
+    if earlier_only:
+        less_equal &= np.tri(len(points), k=-1, dtype=bool)
+    return np.any(less_equal, axis=1)
+
+
+def _non_dominated_mask_2d(points):
+    # Sweep over the unique points in lexicographic order: a point is dominated
+    # if and only if an earlier point has a smaller or equal second objective.
+    unique_points, inverse = np.unique(points, axis=0, return_inverse=True)
+    previous_min = np.minimum.accumulate(unique_points[:, 1])
+    previous_min = np.concatenate(([np.inf], previous_min[:-1]))
+    non_dominated = previous_min > unique_points[:, 1]
+    return non_dominated[inverse.ravel()]
+
+
+def _non_dominated_mask_3d(points):
+    # Sweep over the unique points in lexicographic order keeping the staircase
+    # of the non-dominated (f_2, f_3) pairs seen so far, sorted by f_2 with f_3
+    # decreasing. A point is dominated if and only if the staircase has a pair
+    # smaller or equal in both objectives.
+    unique_points, inverse = np.unique(points, axis=0, return_inverse=True)
+    non_dominated = np.zeros(len(unique_points), dtype=bool)
+    staircase_f2 = []
+    staircase_f3 = []
+
+    for i, (_, f2, f3) in enumerate(unique_points.tolist()):
+        position = bisect.bisect_right(staircase_f2, f2)
+        if position > 0 and staircase_f3[position - 1] <= f3:
+            continue
+        non_dominated[i] = True
+        end = position
+        while end < len(staircase_f2) and staircase_f3[end] >= f3:
+            end += 1
+        staircase_f2[position:end] = [f2]
+        staircase_f3[position:end] = [f3]
+
+    return non_dominated[inverse.ravel()]
+
+
+def _non_dominated_mask_blocks(points, block_size):
+    # In lexicographic order every point comes after the points dominating it,
+    # so each block of unique points only has to be compared with the points
+    # before it in the block and with the non-dominated points of the previous
+    # blocks.
+    unique_points, inverse = np.unique(points, axis=0, return_inverse=True)
+    non_dominated = np.zeros(len(unique_points), dtype=bool)
+    archive = np.empty((0, points.shape[1]))
+
+    for start in range(0, len(unique_points), block_size):
+        block = unique_points[start : start + block_size]
+        # Only archive points below the block maximum can dominate block points
+        candidates = archive[np.all(archive <= np.max(block, axis=0), axis=1)]
+        dominated = _weakly_dominated_by(block, candidates)
+        dominated |= _weakly_dominated_by(block, block, earlier_only=True)
+        non_dominated[start : start + block_size] = ~dominated
+        archive = np.vstack((archive, block[~dominated]))
+
+    return non_dominated[inverse.ravel()]
+
+
+def non_dominated_mask(points, block_size=256):
+    """
+    Find the non-dominated points of a set, assuming minimization.
+
+    Two and three objectives are handled with O(n log n) sweeps (Kung's
+    algorithm), more objectives with a lexicographic sweep that compares blocks
+    of points with the current non-dominated archive in a vectorized way.
+    Identical points do not dominate each other.
+
+    Args:
+    points (numpy.ndarray): Objective vectors with shape (n, k).
+    block_size (int): Number of points compared at once when k > 3.
+
+    Returns:
+    numpy.ndarray: Boolean mask of the non-dominated points.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+    k = points.shape[1]
+    if k == 1:
+        return points[:, 0] == np.min(points[:, 0])
+    if k == 2:
+        return _non_dominated_mask_2d(points)
+    if k == 3:
+        return _non_dominated_mask_3d(points)
+    return _non_dominated_mask_blocks(points, block_size)
+
+
+def non_dominated(points, block_size=256):
+    """
+    Return the non-dominated points of a set, assuming minimization.
+    """
+    points = np.asarray(points, dtype=float)
+    return points[non_dominated_mask(points, block_size)]
+
+
+def non_dominated_ranks(points, block_size=256):
+    """
+    Sort a set of points into non-dominated fronts, assuming minimization.
+
+    Args:
+    points (numpy.ndarray): Objective vectors with shape (n, k).
+    block_size (int): Number of points compared at once when k > 3.
+
+    Returns:
+    numpy.ndarray: Index of the front of every point, 0 for the non-dominated ones.
+    """
+    points = np.asarray(points, dtype=float)
+    ranks = np.full(len(points), -1)
+    remaining = np.arange(len(points))
+    rank = 0
+    while len(remaining) > 0:
+        mask = non_dominated_mask(points[remaining], block_size)
+        ranks[remaining[mask]] = rank
+        remaining = remaining[~mask]
+        rank += 1
+    return ranks
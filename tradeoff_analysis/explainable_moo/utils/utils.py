@@ -1,21 +1,79 @@
+import weakref
+
 import numpy as np
 from desdeo_problem import MOProblem, ScalarObjective
 
 
 def get_min_max(ideal, nadir):
-    num_objectives = len(ideal)
-    min_value = np.zeros(num_objectives)
-    max_value = np.zeros(num_objectives)
-
-    for i in range(num_objectives):
-        if ideal[i] >= nadir[i]:
-            min_value[i] = nadir[i]
-            max_value[i] = ideal[i]
-        else:
-            min_value[i] = ideal[i]
-            max_value[i] = nadir[i]
-
-    return min_value, max_value
+    ideal = np.asarray(ideal, dtype=float)
+    nadir = np.asarray(nadir, dtype=float)
+    return np.minimum(ideal, nadir), np.maximum(ideal, nadir)
+
+
+class Normalizer:
+    """
+    Normalization of the objective space between an ideal and a nadir point.
+
+    The offset and scale are computed once, and the normalized objective
+    functions once per problem, so a Normalizer can be built per problem and
+    shared by all the solves instead of recomputing them for every reference
+    point. The transforms broadcast, so they apply equally to a single vector
+    and to a batch with shape (n, k).
+
+    Args:
+    ideal (numpy.ndarray): Ideal point.
+    nadir (numpy.ndarray): Nadir point.
+    """
+
+    def __init__(self, ideal, nadir):
+        self.ideal = np.asarray(ideal, dtype=float)
+        self.nadir = np.asarray(nadir, dtype=float)
+        self.min_value, self.max_value = get_min_max(self.ideal, self.nadir)
+        self.offset = self.min_value
+        scale = self.max_value - self.min_value
+        # A degenerate objective (ideal == nadir) is only shifted
+        self.scale = np.where(scale > 0, scale, 1)
+        self._parsed_objectives = weakref.WeakKeyDictionary()
+
+    def normalize(self, values):
+        """Map objective vectors or reference points to the normalized space."""
+        return (np.asarray(values, dtype=float) - self.offset) / self.scale
+
+    def denormalize(self, values):
+        """Map normalized objective vectors back to the original space."""
+        return np.asarray(values, dtype=float) * self.scale + self.offset
+
+    def normalize_jacobian(self, jacobian):
+        """Scale Jacobians with shape (..., k, num_variables) like the objectives."""
+        return np.asarray(jacobian, dtype=float) / self.scale[:, np.newaxis]
+
+    def parse_objectives(self, problem: MOProblem):
+        """
+        Normalized objective functions of the problem, see parse_objectives.
+        They are built on the first call for a problem and reused afterwards.
+        """
+        parsed_objectives = self._parsed_objectives.get(problem)
+        if parsed_objectives is None:
+            parsed_objectives = self._build_parsed_objectives(problem)
+            self._parsed_objectives[problem] = parsed_objectives
+        return parsed_objectives
+
+    def _build_parsed_objectives(self, problem: MOProblem):
+        objectives = problem.objectives
+        parsed_objectives = []
+        for i in range(problem.n_of_objectives):
+
+            def parsed_obj(
+                x,
+                obj=objectives[i]._func_evaluate,
+                offset=self.offset[i],
+                scale=self.scale[i],
+            ):
+                return (obj(x) - offset) / scale
+
+            parsed_objectives.append(parsed_obj)
+
+        return tuple(parsed_objectives)
 
 
 def normalize_front(data):
@@ -23,8 +81,7 @@ def normalize_front(data):
 
 
 def normalize_reference_point(rp, ideal, nadir):
-    min_value, max_value = get_min_max(ideal, nadir)
-    return (rp - min_value) / (max_value - min_value)
+    return Normalizer(ideal, nadir).normalize(rp)
 
 
 def normalize_objectives(problem: MOProblem, ideal, nadir):
@@ -46,17 +103,4 @@ def normalize_objectives(problem: MOProblem, ideal, nadir):
 
 
 def parse_objectives(problem: MOProblem, ideal, nadir):
-    objectives = problem.objectives
-    num_objectives = problem.n_of_objectives
-    min_value, max_value = get_min_max(ideal, nadir)
-    parsed_objectives = []
-    for i in range(num_objectives):
-
-        def parsed_obj(
-            x, obj=objectives[i]._func_evaluate, ideal=min_value[i], nadir=max_value[i]
-        ):
-            return (obj(x) - ideal) / (nadir - ideal)
-
-        parsed_objectives.append(parsed_obj)
-
-    return parsed_objectives
+    return Normalizer(ideal, nadir).parse_objectives(problem)
@@ -0,0 +1,75 @@
+import json
+import threading
+
+import pytest
+
+from explainable_moo import api
+from explainable_moo.utils.jobs import JobQueue
+
+REFERENCE_POINTS = [[5.5, 3.2, 4.0, -4.0], [5.0, 3.0, 2.0, -2.0]]
+
+
+@pytest.fixture
+def client():
+    return api.app.test_client()
+
+
+@pytest.fixture
+def saturated_queue(monkeypatch):
+    queue = JobQueue(max_workers=1, max_pending=1)
+    release = threading.Event()
+    queue.submit("blocking", release.wait, 5)
+    monkeypatch.setattr(api, "solver_jobs", queue)
+    yield queue
+    release.set()
+
+
+@pytest.mark.parametrize(
+    "endpoint, data",
+    [
+        ("/get_solution", {"problem_id": 1, "reference_point": REFERENCE_POINTS[0]}),
+        ("/submit_solution", {"problem_id": 1, "reference_point": REFERENCE_POINTS[0]}),
+        (
+            "/get_solutions_batch",
+            {"problem_id": 1, "reference_points": REFERENCE_POINTS},
+        ),
+        ("/stream_solutions", {"problem_id": 1, "reference_points": REFERENCE_POINTS}),
+    ],
+)
+def test_saturated_queue_answers_429(client, saturated_queue, endpoint, data):
+    response = client.post(endpoint, json=data)
+
+    assert response.status_code == 429
+    assert "error" in response.get_json()
+
+
+def test_endpoints_return_the_same_solutions(client, monkeypatch):
+    monkeypatch.setattr(api, "solver_jobs", JobQueue())
+    api.solution_cache.clear()
+
+    single = [
+        client.post(
+            "/get_solution", json={"problem_id": 1, "reference_point": point}
+        ).get_json()
+        for point in REFERENCE_POINTS
+    ]
+    api.solution_cache.clear()
+    batch = client.post(
+        "/get_solutions_batch",
+        json={"problem_id": 1, "reference_points": REFERENCE_POINTS},
+    ).get_json()
+    api.solution_cache.clear()
+    stream = [
+        json.loads(line)
+        for line in client.post(
+            "/stream_solutions",
+            json={"problem_id": 1, "reference_points": REFERENCE_POINTS},
+        )
+        .get_data(as_text=True)
+        .splitlines()
+    ]
+
+    for n, solution in enumerate(single):
+        for name in ("lagrange_multipliers", "fx"):
+            assert batch[name][n] == pytest.approx(solution[name])
+            assert stream[n][name] == pytest.approx(solution[name])
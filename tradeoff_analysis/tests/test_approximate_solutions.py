@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from explainable_moo.core.lime_explanations.approximate_solutions import (
+    NeighborhoodSampler,
+    compute_slope_svd,
+    construct_tangent_hyperplane,
+)
+
+
+def test_normal_with_fewer_differences_than_objectives():
+    hyperplane = compute_slope_svd([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+
+    np.testing.assert_allclose(hyperplane.normal, [0.0, 0.0, 1.0], atol=1e-12)
+    assert hyperplane.effective_rank == 2
+
+
+def test_normal_of_a_plane():
+    rng = np.random.default_rng(0)
+    points = rng.random((10, 3))
+    points[:, 2] = 1 - points[:, 0] - points[:, 1]
+
+    hyperplane = construct_tangent_hyperplane(points[0], points[1:])
+
+    np.testing.assert_allclose(hyperplane.normal, np.full(3, 1 / np.sqrt(3)))
+    assert hyperplane.effective_rank == 2
+
+
+def test_batch_with_fewer_differences_than_objectives():
+    differences = np.array(
+        [
+            [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+            [[0.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+        ]
+    )
+
+    hyperplane = compute_slope_svd(differences)
+
+    np.testing.assert_allclose(
+        np.abs(hyperplane.normal), [[0.0, 0.0, 1.0], [1.0, 0.0, 0.0]], atol=1e-12
+    )
+    np.testing.assert_array_equal(hyperplane.effective_rank, [2, 2])
+
+
+@pytest.mark.parametrize("method", ["lhs", "sobol"])
+def test_every_neighborhood_is_stratified(method):
+    sampler = NeighborhoodSampler(3, pool_size=64, method=method, seed=0)
+
+    # More neighborhoods than blocks in a pool, so the pool is drawn again
+    for _ in range(6):
+        samples = sampler.samples(16)
+        strata = np.floor((samples + 1) / 2 * 16).astype(int)
+        for variable in range(3):
+            np.testing.assert_array_equal(np.sort(strata[:, variable]), np.arange(16))
+
+
+def test_consecutive_neighborhoods_differ_and_are_reproducible():
+    first = NeighborhoodSampler(4, seed=1)
+    second = NeighborhoodSampler(4, seed=1)
+
+    directions = [first.directions(50) for _ in range(3)]
+
+    assert not np.allclose(directions[0], directions[1])
+    for expected in directions:
+        np.testing.assert_array_equal(second.directions(50), expected)
+    np.testing.assert_allclose(np.linalg.norm(directions[0], axis=1), 1)
+
+
+def test_block_index_returns_the_same_neighborhood():
+    sampler = NeighborhoodSampler(2, seed=0)
+
+    points = sampler.points([1.0, 2.0], 10, 0.5, block=3)
+    sampler.points([1.0, 2.0], 10, 0.5)
+
+    np.testing.assert_array_equal(sampler.points([1.0, 2.0], 10, 0.5, block=3), points)
+    np.testing.assert_allclose(np.linalg.norm(points - [1.0, 2.0], axis=1), 0.5)
@@ -0,0 +1,51 @@
+import numpy as np
+
+from explainable_moo.utils.cache import SolutionCache
+
+W = [0.5, 0.5]
+
+
+def _solution(value):
+    return {
+        "x": [value],
+        "lagrange_multipliers": [0.5, 0.5],
+        "fx": [value, value],
+        "partial_tradeoffs": [[1.0, -1.0], [-1.0, 1.0]],
+    }
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SolutionCache(maxsize=2)
+    cache.put(1, [0.0, 0.0], W, _solution(0))
+    cache.put(1, [1.0, 1.0], W, _solution(1))
+
+    # Reading the first entry makes the second one the least recently used
+    assert cache.get(1, [0.0, 0.0], W) is not None
+    cache.put(1, [2.0, 2.0], W, _solution(2))
+
+    assert len(cache) == 2
+    assert cache.get(1, [1.0, 1.0], W) is None
+    np.testing.assert_array_equal(cache.get(1, [0.0, 0.0], W)["x"], [0])
+    np.testing.assert_array_equal(cache.get(1, [2.0, 2.0], W)["x"], [2])
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_keys_are_rounded_and_include_the_problem_and_weights():
+    cache = SolutionCache(decimal_places=3)
+    cache.put(1, [0.1234, 0.5], W, _solution(0))
+
+    assert cache.get(1, [0.12341, 0.5], W) is not None
+    assert cache.get(1, [0.124, 0.5], W) is None
+    assert cache.get(2, [0.1234, 0.5], W) is None
+    assert cache.get(1, [0.1234, 0.5], [0.4, 0.6]) is None
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = SolutionCache(path=path)
+    cache.put(1, [0.0, 1.0], W, _solution(3))
+    cache.save()
+
+    loaded = SolutionCache(path=path)
+
+    np.testing.assert_array_equal(loaded.get(1, [0.0, 1.0], W)["fx"], [3, 3])
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from explainable_moo.core.lime_explanations.discrete import (
+    explain_front_point,
+    explain_front_points,
+)
+from explainable_moo.utils.front_index import FrontIndex
+
+
+@pytest.fixture(scope="module")
+def sphere_index():
+    # Dense discrete front f_1^2 + f_2^2 + f_3^2 = 1 in the positive octant.
+    # Its normal at p is p, so at the solution of the ASF problem the
+    # multipliers are proportional to p_i / w_i.
+    rng = np.random.default_rng(0)
+    front = np.abs(rng.normal(size=(50_000, 3)))
+    front /= np.linalg.norm(front, axis=1)[:, np.newaxis]
+    return FrontIndex(front, ideal=np.zeros(3), nadir=np.ones(3))
+
+
+@pytest.mark.parametrize(
+    "w", [np.full(3, 1 / 3), np.array([0.2, 0.3, 0.5])], ids=["equal", "unequal"]
+)
+@pytest.mark.parametrize("p", [[1, 1, 1], [1, 2, 2], [3, 1, 2]])
+def test_multipliers_match_the_analytic_ones(sphere_index, w, p):
+    p = np.asarray(p, dtype=float) / np.linalg.norm(p)
+    # The ASF problem of z is solved at p, which lies on z + t / w
+    reference_point = p - 0.1 / w
+
+    point, lambdas, rank = explain_front_point(sphere_index, reference_point, w)
+
+    expected = p / w / np.sum(p / w)
+    np.testing.assert_allclose(sphere_index.objectives[point], p, atol=0.02)
+    np.testing.assert_allclose(lambdas, expected, atol=0.03)
+    assert rank >= 2
+
+
+def test_batch_matches_single_points(sphere_index):
+    w = np.full(3, 1 / 3)
+    reference_points = np.array([[0.3, 0.3, 0.3], [0.5, 0.1, 0.2], [0.0, 0.6, 0.1]])
+
+    points, lambdas, ranks = explain_front_points(sphere_index, reference_points, w)
+
+    for n, reference_point in enumerate(reference_points):
+        point, expected_lambdas, rank = explain_front_point(
+            sphere_index, reference_point, w
+        )
+        assert points[n] == point
+        np.testing.assert_array_equal(lambdas[n], expected_lambdas)
+        assert ranks[n] == rank
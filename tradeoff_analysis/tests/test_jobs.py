@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from explainable_moo.utils.jobs import JobQueue, QueueFullError
+
+
+def test_identical_jobs_in_flight_are_coalesced():
+    queue = JobQueue(max_workers=1, max_pending=4)
+    release = threading.Event()
+    calls = []
+
+    def job(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    first = queue.submit("key", job, 21)
+    second = queue.submit("key", job, 21)
+    other = queue.submit("other", job, 1)
+    assert first == second
+    assert other != first
+    assert queue.depth == 2
+
+    release.set()
+    assert queue.future(first).result(timeout=5) == 42
+    assert queue.future(other).result(timeout=5) == 2
+    assert calls == [21, 1]
+    assert queue.status(first) == {"status": "done", "result": 42}
+
+    # A finished job is not coalesced with a new one
+    assert queue.submit("key", job, 21) != first
+
+
+def test_saturated_queue_refuses_jobs():
+    queue = JobQueue(max_workers=1, max_pending=2)
+    release = threading.Event()
+
+    queue.submit("a", release.wait, 5)
+    queue.submit("b", release.wait, 5)
+    with pytest.raises(QueueFullError):
+        queue.submit("c", release.wait, 5)
+    # Coalescing with a job in flight does not need a free slot
+    queue.submit("a", release.wait, 5)
+
+    release.set()
+
+
+def test_failed_job_reports_its_error():
+    queue = JobQueue()
+
+    def failing_job():
+        raise ValueError("no solution")
+
+    job_id = queue.submit("key", failing_job)
+
+    with pytest.raises(ValueError):
+        queue.future(job_id).result(timeout=5)
+    assert queue.status(job_id) == {"status": "failed", "error": "no solution"}
+    assert queue.status("unknown") is None
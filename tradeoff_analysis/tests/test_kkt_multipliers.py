@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+from scipy.optimize import OptimizeResult
+
+from explainable_moo.core.lime_explanations import kkt_multipliers
+from explainable_moo.core.lime_explanations.kkt_multipliers import (
+    SolverError,
+    compute_multipliers,
+    finite_difference_evaluator,
+)
+from explainable_moo.problems import compiled, problems
+from explainable_moo.utils.utils import Normalizer
+
+IDEAL = np.array([-6.34, -3.44487179, -7.5, 0.0])
+NADIR = np.array([-4.751, -2.85346154, -0.32111111, 9.70666667])
+
+
+def _reference_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return IDEAL + rng.uniform(0.2, 0.8, (n, len(IDEAL))) * (NADIR - IDEAL)
+
+
+@pytest.mark.parametrize(
+    "w", [np.full(4, 0.25), np.array([0.1, 0.2, 0.3, 0.4])], ids=["equal", "unequal"]
+)
+def test_scipy_multipliers_satisfy_the_kkt_conditions(w):
+    problem = problems.river_pollution_problem()
+    evaluator = compiled.compiled_river_pollution_evaluator()
+    normalizer = Normalizer(IDEAL, NADIR)
+    lower_bounds = np.asarray(problem.get_variable_lower_bounds())
+    upper_bounds = np.asarray(problem.get_variable_upper_bounds())
+
+    for z_dot in _reference_points(10):
+        x, lagrange_multipliers = compute_multipliers(
+            problem,
+            w,
+            z_dot,
+            IDEAL,
+            NADIR,
+            backend="scipy",
+            evaluator=evaluator,
+            normalizer=normalizer,
+        )
+        fx, jacobian = evaluator(x)
+        terms = w * (normalizer.normalize(fx[0]) - normalizer.normalize(z_dot))
+        alpha = np.max(terms)
+
+        # Dual feasibility and stationarity with respect to alpha
+        assert np.all(lagrange_multipliers >= 0)
+        assert np.sum(lagrange_multipliers) == pytest.approx(1)
+        # Complementary slackness
+        np.testing.assert_allclose(lagrange_multipliers * (alpha - terms), 0, atol=1e-6)
+        # Stationarity with respect to the variables that are not at a bound
+        gradient = (lagrange_multipliers * w) @ normalizer.normalize_jacobian(
+            jacobian[0]
+        )
+        free = (x - lower_bounds > 1e-6) & (upper_bounds - x > 1e-6)
+        np.testing.assert_allclose(gradient[free], 0, atol=1e-5)
+
+
+def test_scipy_backend_matches_finite_differences():
+    problem = problems.river_pollution_problem()
+    z_dot = _reference_points(1, seed=1)[0]
+
+    x, lagrange_multipliers = compute_multipliers(
+        problem,
+        np.full(4, 0.25),
+        z_dot,
+        IDEAL,
+        NADIR,
+        backend="scipy",
+        evaluator=compiled.compiled_river_pollution_evaluator(),
+    )
+    x_fd, lagrange_multipliers_fd = compute_multipliers(
+        problem, np.full(4, 0.25), z_dot, IDEAL, NADIR, backend="scipy"
+    )
+
+    np.testing.assert_allclose(x_fd, x, atol=1e-5)
+    np.testing.assert_allclose(lagrange_multipliers_fd, lagrange_multipliers, atol=1e-4)
+
+
+def test_failed_scipy_solve_raises(monkeypatch):
+    def failed_minimize(fun, x0, **kwargs):
+        return OptimizeResult(
+            x=x0, success=False, message="Iteration limit reached", status=9
+        )
+
+    monkeypatch.setattr(kkt_multipliers, "minimize", failed_minimize)
+
+    with pytest.raises(SolverError, match="Iteration limit reached"):
+        compute_multipliers(
+            problems.river_pollution_problem(),
+            np.full(4, 0.25),
+            _reference_points(1)[0],
+            IDEAL,
+            NADIR,
+            backend="scipy",
+        )
+
+
+def test_finite_differences_stay_within_the_bounds():
+    problem = problems.river_pollution_problem()
+    evaluated = []
+    evaluate = problem.evaluate
+
+    def recording_evaluate(x, *args, **kwargs):
+        evaluated.append(np.array(x))
+        return evaluate(x, *args, **kwargs)
+
+    problem.evaluate = recording_evaluate
+    x = np.array([[1.0, 1.0], [0.3, 0.65]])
+
+    _, jacobian = finite_difference_evaluator(problem)(x)
+
+    assert np.all(np.concatenate(evaluated) <= problem.get_variable_upper_bounds())
+    np.testing.assert_allclose(
+        jacobian, problems.river_pollution_evaluator()(x)[1], rtol=1e-4, atol=1e-6
+    )
+
+
+def test_failed_warm_start_is_retried_from_the_initial_values(monkeypatch):
+    minimize = kkt_multipliers.minimize
+    starts = []
+
+    def failing_warm_start(fun, x0, **kwargs):
+        starts.append(np.array(x0))
+        if len(starts) == 1:
+            return OptimizeResult(x=x0, success=False, message="Warm start failed")
+        return minimize(fun, x0, **kwargs)
+
+    monkeypatch.setattr(kkt_multipliers, "minimize", failing_warm_start)
+    problem = problems.river_pollution_problem()
+    args = (problem, np.full(4, 0.25), _reference_points(1)[0], IDEAL, NADIR)
+
+    x, lagrange_multipliers = compute_multipliers(
+        *args, backend="scipy", x0=np.array([0.31, 0.31])
+    )
+
+    assert len(starts) == 2
+    np.testing.assert_allclose(
+        starts[1][:2], [variable.initial_value for variable in problem.variables]
+    )
+    np.testing.assert_allclose(
+        x, compute_multipliers(*args, backend="scipy")[0], atol=1e-6
+    )
+    assert np.sum(lagrange_multipliers) == pytest.approx(1)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from explainable_moo.utils.non_dominated import (
+    non_dominated,
+    non_dominated_mask,
+    non_dominated_ranks,
+)
+
+
+def _brute_force_mask(points):
+    # A point is dominated if another point is smaller or equal in every
+    # objective and strictly smaller in at least one
+    less_equal = np.all(points[:, np.newaxis, :] <= points[np.newaxis, :, :], axis=2)
+    less = np.any(points[:, np.newaxis, :] < points[np.newaxis, :, :], axis=2)
+    return ~np.any(less_equal & less, axis=0)
+
+
+def _points(n, k, seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct values, so that there are ties and duplicate points
+    return rng.integers(0, 6, (n, k)).astype(float)
+
+
+@pytest.mark.parametrize("k", [1, 2, 3, 4, 6])
+@pytest.mark.parametrize("seed", range(5))
+def test_mask_matches_brute_force(k, seed):
+    points = _points(300, k, seed)
+
+    # A small block size exercises the comparisons across blocks
+    mask = non_dominated_mask(points, block_size=16)
+
+    np.testing.assert_array_equal(mask, _brute_force_mask(points))
+
+
+def test_continuous_points_on_a_front():
+    rng = np.random.default_rng(0)
+    front = rng.dirichlet(np.ones(3), size=200)
+    points = np.vstack((front, front + rng.uniform(0.01, 1, front.shape)))
+
+    np.testing.assert_array_equal(non_dominated(points), front)
+
+
+def test_ranks_match_repeated_brute_force():
+    points = _points(200, 3, seed=7)
+
+    ranks = non_dominated_ranks(points)
+
+    remaining = np.arange(len(points))
+    rank = 0
+    while len(remaining) > 0:
+        mask = _brute_force_mask(points[remaining])
+        np.testing.assert_array_equal(ranks[remaining[mask]], rank)
+        remaining = remaining[~mask]
+        rank += 1
+    assert ranks.max() == rank - 1
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from explainable_moo.problems import compiled, problems
+
+CASES = [
+    (
+        lambda: problems.river_pollution_problem(),
+        problems.river_pollution_evaluator(),
+        compiled.compiled_river_pollution_evaluator(),
+    ),
+    (
+        lambda: problems.river_pollution_problem(five_obj=True),
+        problems.river_pollution_evaluator(five_obj=True),
+        compiled.compiled_river_pollution_evaluator(five_obj=True),
+    ),
+    (
+        problems.car_crash_problem,
+        problems.car_crash_evaluator(),
+        compiled.compiled_car_crash_evaluator(),
+    ),
+]
+
+
+def _decision_vectors(problem, n, seed=0):
+    lower_bounds = np.asarray(problem.get_variable_lower_bounds(), dtype=float)
+    upper_bounds = np.asarray(problem.get_variable_upper_bounds(), dtype=float)
+    rng = np.random.default_rng(seed)
+    # Away from the bounds, so that the central differences stay inside them
+    return lower_bounds + rng.uniform(0.05, 0.95, (n, len(lower_bounds))) * (
+        upper_bounds - lower_bounds
+    )
+
+
+@pytest.mark.parametrize("problem_factory, evaluator, compiled_evaluator", CASES)
+def test_evaluators_agree_with_the_objectives(
+    problem_factory, evaluator, compiled_evaluator
+):
+    problem = problem_factory()
+    x = _decision_vectors(problem, 50)
+    expected = problem.evaluate(x).objectives
+
+    fx, jacobian = evaluator(x)
+    compiled_fx, compiled_jacobian = compiled_evaluator(x)
+
+    np.testing.assert_allclose(fx, expected, rtol=1e-12)
+    np.testing.assert_allclose(compiled_fx, expected, rtol=1e-12)
+    np.testing.assert_allclose(compiled_evaluator(x, jacobian=False), expected)
+    np.testing.assert_allclose(compiled_jacobian, jacobian, rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("problem_factory, evaluator, compiled_evaluator", CASES)
+def test_jacobians_match_central_differences(
+    problem_factory, evaluator, compiled_evaluator
+):
+    problem = problem_factory()
+    x = _decision_vectors(problem, 20, seed=1)
+    step = 1e-6
+
+    _, jacobian = compiled_evaluator(x)
+
+    for variable in range(problem.n_of_variables):
+        h = np.zeros(problem.n_of_variables)
+        h[variable] = step
+        forward = problem.evaluate(x + h).objectives
+        backward = problem.evaluate(x - h).objectives
+        np.testing.assert_allclose(
+            jacobian[:, :, variable],
+            (forward - backward) / (2 * step),
+            rtol=1e-5,
+            atol=1e-6,
+        )
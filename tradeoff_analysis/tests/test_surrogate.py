@@ -0,0 +1,69 @@
+import numpy as np
+from scipy.linalg import lstsq
+
+from explainable_moo.core.lime_explanations.surrogate import (
+    fit_local_surrogate,
+    kernel_weights,
+)
+
+
+def _neighborhood(seed, m=40, k=4):
+    rng = np.random.default_rng(seed)
+    dot_z = rng.normal(size=k)
+    z_values = dot_z + rng.normal(scale=[0.1, 1.0, 5.0, 0.5][:k], size=(m, k))
+    z_values[:, 1] += 0.8 * z_values[:, 0]
+    return dot_z, z_values
+
+
+def _weighted_fit(z_i, z_j, weights):
+    sqrt_weights = np.sqrt(weights)
+    design = np.column_stack((np.ones_like(z_i), z_i)) * sqrt_weights[:, np.newaxis]
+    (intercept, slope), *_ = lstsq(design, z_j * sqrt_weights)
+    residuals = z_j - intercept - slope * z_i
+    mean = np.average(z_j, weights=weights)
+    r_squared = 1 - np.sum(weights * residuals**2) / np.sum(weights * (z_j - mean) ** 2)
+    return slope, intercept, r_squared
+
+
+def test_surrogate_matches_weighted_least_squares_per_pair():
+    dot_z, z_values = _neighborhood(0)
+
+    explanation = fit_local_surrogate(dot_z, z_values)
+
+    k = z_values.shape[1]
+    for i in range(k):
+        for j in range(k):
+            if i == j:
+                continue
+            slope, intercept, r_squared = _weighted_fit(
+                z_values[:, i], z_values[:, j], explanation.weights
+            )
+            assert np.isclose(explanation.slopes[i, j], slope)
+            assert np.isclose(explanation.intercepts[i, j], intercept)
+            assert np.isclose(explanation.fidelity[i, j], r_squared)
+    np.testing.assert_array_equal(np.diagonal(explanation.slopes), 1)
+
+
+def test_batch_matches_single_fits():
+    neighborhoods = [_neighborhood(seed) for seed in range(3)]
+    dot_z = np.array([dot_z for dot_z, _ in neighborhoods])
+    z_values = np.array([z_values for _, z_values in neighborhoods])
+
+    batch = fit_local_surrogate(dot_z, z_values)
+
+    for n, (single_dot_z, single_z_values) in enumerate(neighborhoods):
+        single = fit_local_surrogate(single_dot_z, single_z_values)
+        np.testing.assert_allclose(batch.slopes[n], single.slopes)
+        np.testing.assert_allclose(batch.intercepts[n], single.intercepts)
+        np.testing.assert_allclose(batch.fidelity[n], single.fidelity)
+
+
+def test_kernel_weights_decrease_with_the_scaled_distance():
+    dot_z = np.zeros(2)
+    z_values = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.0, 10.0]])
+
+    weights = kernel_weights(dot_z, z_values)
+
+    assert weights[0] == 1
+    assert weights[0] > weights[1] > weights[2]
+    assert np.all(weights > 0)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from explainable_moo.problems import problems
+from explainable_moo.utils.utils import Normalizer
+
+
+def test_degenerate_objective_is_only_shifted():
+    normalizer = Normalizer([0.0, 2.0], [4.0, 2.0])
+
+    normalized = normalizer.normalize([[1.0, 2.0], [4.0, 3.0]])
+
+    np.testing.assert_array_equal(normalized, [[0.25, 0.0], [1.0, 1.0]])
+    np.testing.assert_array_equal(normalizer.denormalize(normalized), [[1, 2], [4, 3]])
+    assert np.all(np.isfinite(normalizer.normalize_jacobian(np.ones((2, 3)))))
+
+
+def test_parsed_objectives_are_built_once_per_problem():
+    problem = problems.river_pollution_problem()
+    normalizer = Normalizer(
+        [-6.34, -3.44487179, -7.5, 0.0], [-4.751, -2.85346154, -0.32111111, 9.70666667]
+    )
+    x = np.array([0.6, 0.8])
+
+    parsed_objectives = normalizer.parse_objectives(problem)
+
+    assert normalizer.parse_objectives(problem) is parsed_objectives
+    np.testing.assert_allclose(
+        [objective(x)[0, 0] for objective in parsed_objectives],
+        normalizer.normalize(problem.evaluate(x).objectives[0]),
+    )